@@ -2,10 +2,12 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_migrate import Migrate
+from app.services.replica import SessaoRoteada
 import os
 
 # Inicializar extensões
-db = SQLAlchemy()
+# SessaoRoteada: leituras na réplica quando REPLICA_URI está configurada
+db = SQLAlchemy(session_options={'class_': SessaoRoteada})
 login_manager = LoginManager()
 migrate = Migrate()
 
@@ -19,7 +21,13 @@ def create_app(config_name='default'):
 
     # Garantir que pastas necessárias existam
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-    os.makedirs(os.path.join(app.root_path, '..', 'logs'), exist_ok=True)
+    os.makedirs(app.config['RELATORIOS_FOLDER'], exist_ok=True)
+
+    # Pool de conexões com estatísticas (/health) e réplica de leitura opcional
+    from app.services.banco import configurar_pool
+    from app.services.replica import configurar_replica
+    configurar_pool(app)
+    configurar_replica(app)
 
     # Inicializar extensões com a app
     db.init_app(app)
@@ -31,21 +39,31 @@ def create_app(config_name='default'):
     login_manager.login_message = 'Por favor, faça login para acessar esta página.'
     login_manager.login_message_category = 'info'
 
+    # Logs em JSON (LOG_FILE), gravados fora da thread da requisição
+    from app.services.logs import configurar_logs
+    configurar_logs(app)
+
+    # Métricas por requisição (SQL, templates, Server-Timing), se METRICAS_ATIVAS
+    from app.services.metricas import configurar_metricas
+    configurar_metricas(app)
+
     # Importar e registrar blueprints
-    from app.routes import auth, dashboard, alunos, pets, relatorios
+    from app.routes import auth, dashboard, alunos, pets, relatorios, metricas, saude
 
     app.register_blueprint(auth.bp)
     app.register_blueprint(dashboard.bp)
     app.register_blueprint(alunos.bp)
     app.register_blueprint(pets.bp)
     app.register_blueprint(relatorios.bp)
+    app.register_blueprint(metricas.bp)
+    app.register_blueprint(saude.bp)
 
     # User loader para Flask-Login
-    from app.models.user import User
+    from app.services.usuarios import carregar_usuario
 
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return carregar_usuario(int(user_id))
 
     # Contexto de template global
     @app.context_processor
@@ -56,8 +74,10 @@ def create_app(config_name='default'):
             return ''
         return dict(format_date=format_date)
 
-    # Criar tabelas se não existirem
-    with app.app_context():
-        db.create_all()
+    # Esquema gerenciado por flask init-db / flask db upgrade; criar as tabelas
+    # aqui abriria uma conexão em cada worker, comando e teste
+    if app.config['CRIAR_TABELAS_AO_INICIAR']:
+        with app.app_context():
+            db.create_all()
 
     return app
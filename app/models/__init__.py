@@ -1,5 +1,6 @@
 from app.models.user import User
 from app.models.aluno import Aluno
 from app.models.pet import Pet
+from app.models.estatistica import Estatistica
 
-__all__ = ['User', 'Aluno', 'Pet']
+__all__ = ['User', 'Aluno', 'Pet', 'Estatistica']
@@ -4,6 +4,18 @@ from datetime import datetime
 class Aluno(db.Model):
     """Modelo de Aluno"""
     __tablename__ = 'alunos'
+    # Índices das consultas frequentes (mesmos nomes em create_tables.sql e
+    # nas migrações). O InnoDB e o SQLite guardam o id em cada índice, então
+    # idx_nome também serve à ordenação (nome, id) da paginação por cursor.
+    __table_args__ = (
+        db.Index('idx_nome', 'nome'),                     # listagens, autocompletar
+        db.Index('idx_curso', 'curso'),                   # GROUP BY curso
+        db.Index('idx_sexo', 'sexo'),                     # GROUP BY sexo
+        db.Index('idx_idade', 'idade'),                   # faixas de idade, média
+        db.Index('idx_foto_hash', 'foto_hash'),
+        db.Index('idx_alunos_created_at', 'created_at'),  # últimos alunos (dashboard)
+        db.Index('idx_alunos_updated_at', 'updated_at'),  # exportação ?since=, versão da tabela
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     matricula = db.Column(db.String(20), unique=True, nullable=False, index=True)
@@ -11,27 +23,59 @@ class Aluno(db.Model):
     curso = db.Column(db.String(100))
     idade = db.Column(db.Integer)
     sexo = db.Column(db.String(1))  # M ou F
-    foto = db.Column(db.LargeBinary)  # BLOB para armazenar imagem
+    # BLOB legado: carregado só quando acessado (ver app/services/fotos.py)
+    foto = db.deferred(db.Column(db.LargeBinary))
     foto_filename = db.Column(db.String(255))  # Nome do arquivo da foto
+    foto_hash = db.Column(db.String(64))  # SHA-256 do conteúdo da foto
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    # Relacionamento com pets
-    pets = db.relationship('Pet', backref='dono', lazy=True, cascade='all, delete-orphan')
+    # Relacionamento com pets; na exclusão o banco apaga os pets (ON DELETE CASCADE)
+    pets = db.relationship('Pet', backref='dono', lazy=True, cascade='all, delete-orphan',
+                           passive_deletes=True)
 
     def __repr__(self):
         return f'<Aluno {self.matricula} - {self.nome}>'
 
+    @property
+    def tem_foto(self):
+        """Indica se o aluno tem foto sem carregar o BLOB"""
+        return bool(self.foto_hash or self.foto_filename)
+
+    @staticmethod
+    def calcular_foto_versao(foto_hash, updated_at):
+        """Versão da foto para URLs cacheáveis (muda quando a foto muda)"""
+        if foto_hash:
+            return foto_hash[:16]
+        if updated_at:
+            return updated_at.strftime('%Y%m%d%H%M%S')
+        return None
+
+    @property
+    def foto_versao(self):
+        return self.calcular_foto_versao(self.foto_hash, self.updated_at)
+
     def to_dict(self):
         """Converte o objeto para dicionário"""
+        return Aluno.serializar(self)
+
+    @staticmethod
+    def colunas_dict():
+        """Colunas usadas por to_dict (sem a foto), para consultas só de colunas"""
+        return [Aluno.id, Aluno.matricula, Aluno.nome, Aluno.curso, Aluno.idade, Aluno.sexo,
+                Aluno.foto_filename, Aluno.created_at, Aluno.updated_at]
+
+    @staticmethod
+    def serializar(dados):
+        """Dicionário a partir de um Aluno ou de uma linha com as colunas de colunas_dict()"""
         return {
-            'id': self.id,
-            'matricula': self.matricula,
-            'nome': self.nome,
-            'curso': self.curso,
-            'idade': self.idade,
-            'sexo': self.sexo,
-            'foto_filename': self.foto_filename,
-            'created_at': self.created_at.strftime('%d/%m/%Y %H:%M') if self.created_at else None,
-            'updated_at': self.updated_at.strftime('%d/%m/%Y %H:%M') if self.updated_at else None
+            'id': dados.id,
+            'matricula': dados.matricula,
+            'nome': dados.nome,
+            'curso': dados.curso,
+            'idade': dados.idade,
+            'sexo': dados.sexo,
+            'foto_filename': dados.foto_filename,
+            'created_at': dados.created_at.strftime('%d/%m/%Y %H:%M') if dados.created_at else None,
+            'updated_at': dados.updated_at.strftime('%d/%m/%Y %H:%M') if dados.updated_at else None
         }
@@ -0,0 +1,19 @@
+from app import db
+from datetime import datetime
+
+class Estatistica(db.Model):
+    """Contagens pré-agregadas para a página de estatísticas"""
+    __tablename__ = 'estatisticas'
+    __table_args__ = (
+        db.UniqueConstraint('tipo', 'chave', name='uq_estatistica'),
+        db.Index('idx_tipo_total', 'tipo', 'total'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(20), nullable=False)  # curso, sexo, faixa_idade, raca
+    chave = db.Column(db.String(100), nullable=False, default='')  # '' = não informado
+    total = db.Column(db.Integer, nullable=False, default=0)
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Estatistica {self.tipo}:{self.chave}={self.total}>'
@@ -4,12 +4,19 @@ from datetime import datetime
 class Pet(db.Model):
     """Modelo de Pet"""
     __tablename__ = 'pets'
+    # Índices das consultas frequentes (ver Aluno)
+    __table_args__ = (
+        db.Index('idx_aluno', 'aluno_id'),                # pets do aluno, ON DELETE CASCADE
+        db.Index('idx_apelido', 'apelido'),               # listagem ordenada por apelido
+        db.Index('idx_raca', 'raca'),                     # GROUP BY raca
+        db.Index('idx_pets_updated_at', 'updated_at'),    # exportação ?since=, versão da tabela
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     apelido = db.Column(db.String(100), nullable=False)
     raca = db.Column(db.String(100))
     data_nascimento = db.Column(db.Date)
-    aluno_id = db.Column(db.Integer, db.ForeignKey('alunos.id'), nullable=False)
+    aluno_id = db.Column(db.Integer, db.ForeignKey('alunos.id', ondelete='CASCADE'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -18,12 +25,23 @@ class Pet(db.Model):
 
     def to_dict(self):
         """Converte o objeto para dicionário"""
+        return Pet.serializar(self)
+
+    @staticmethod
+    def colunas_dict():
+        """Colunas usadas por to_dict, para consultas só de colunas"""
+        return [Pet.id, Pet.apelido, Pet.raca, Pet.data_nascimento, Pet.aluno_id,
+                Pet.created_at, Pet.updated_at]
+
+    @staticmethod
+    def serializar(dados):
+        """Dicionário a partir de um Pet ou de uma linha com as colunas de colunas_dict()"""
         return {
-            'id': self.id,
-            'apelido': self.apelido,
-            'raca': self.raca,
-            'data_nascimento': self.data_nascimento.strftime('%d/%m/%Y') if self.data_nascimento else None,
-            'aluno_id': self.aluno_id,
-            'created_at': self.created_at.strftime('%d/%m/%Y %H:%M') if self.created_at else None,
-            'updated_at': self.updated_at.strftime('%d/%m/%Y %H:%M') if self.updated_at else None
+            'id': dados.id,
+            'apelido': dados.apelido,
+            'raca': dados.raca,
+            'data_nascimento': dados.data_nascimento.strftime('%d/%m/%Y') if dados.data_nascimento else None,
+            'aluno_id': dados.aluno_id,
+            'created_at': dados.created_at.strftime('%d/%m/%Y %H:%M') if dados.created_at else None,
+            'updated_at': dados.updated_at.strftime('%d/%m/%Y %H:%M') if dados.updated_at else None
         }
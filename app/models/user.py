@@ -1,8 +1,22 @@
 from app import db
+from flask import current_app, has_app_context
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
 from datetime import datetime
 
+# Parâmetros padrão do werkzeug, para comparar 'scrypt' com 'scrypt:32768:8:1'
+PADROES_HASH = {
+    'scrypt': ['scrypt', '32768', '8', '1'],
+    'pbkdf2': ['pbkdf2', 'sha256', str(DEFAULT_PBKDF2_ITERATIONS)],
+}
+
+def metodo_hash():
+    """Método de hash configurado (PASSWORD_HASH_METHOD), com os parâmetros completos"""
+    metodo = current_app.config['PASSWORD_HASH_METHOD'] if has_app_context() else 'scrypt'
+    partes = metodo.split(':')
+    padrao = PADROES_HASH.get(partes[0], [])
+    return ':'.join(partes + padrao[len(partes):])
+
 class User(UserMixin, db.Model):
     """Modelo de usuário para autenticação"""
     __tablename__ = 'users'
@@ -18,11 +32,15 @@ class User(UserMixin, db.Model):
 
     def set_password(self, password):
         """Gera hash da senha"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(password, method=metodo_hash())
 
     def check_password(self, password):
         """Verifica se a senha está correta"""
         return check_password_hash(self.password_hash, password)
 
+    def precisa_rehash(self):
+        """True se o hash foi gerado com método/custo diferente do configurado"""
+        return self.password_hash.split('$', 1)[0] != metodo_hash()
+
     def __repr__(self):
         return f'<User {self.username}>'
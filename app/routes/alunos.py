@@ -1,13 +1,27 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file, jsonify, current_app
 from flask_login import login_required
 from app import db
 from app.models.aluno import Aluno
+from app.services.busca import get_busca, sugerir_alunos
+from app.services.paginacao import paginar, paginar_por_cursor
+from app.services.banco import confirmar
+from app.services.cache import invalidar_ao_alterar, memoizar
+from app.services.fotos import salvar_foto, ler_foto, caminho_miniatura
+from app.services.importacao import importar_arquivo
+from app.services.exclusao import excluir_alunos
+from app.services.exportacao import FORMATOS, parse_since, exportar_modelo
+from app.services.cache_http import gerar_etag, nao_modificado, aplicar_cache, resposta_304, versao_tabela
 from werkzeug.utils import secure_filename
-import os
 from io import BytesIO
+import mimetypes
 
 bp = Blueprint('alunos', __name__, url_prefix='/alunos')
 
+# Totais das listagens em cache: alunos afetam as duas buscas (nome do dono)
+invalidar_ao_alterar(Aluno, 'total:alunos:', 'total:pets:', 'sugestoes:alunos:')
+
+SUGESTOES_LIMITE_MAX = 50
+
 def allowed_file(filename):
     """Verifica se a extensão do arquivo é permitida"""
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
@@ -25,18 +39,37 @@ def index():
     query = Aluno.query
 
     if search:
-        query = query.filter(
-            db.or_(
-                Aluno.nome.like(f'%{search}%'),
-                Aluno.matricula.like(f'%{search}%'),
-                Aluno.curso.like(f'%{search}%')
-            )
-        )
+        query = get_busca().filtrar_alunos(query, search)
 
-    alunos = query.order_by(Aluno.nome).paginate(page=page, per_page=per_page, error_out=False)
+    # ?modo=cursor: paginação por keyset em (nome, id), sem OFFSET
+    modo = request.args.get('modo', current_app.config['PAGINACAO_MODO'])
+    if modo == 'cursor':
+        alunos = paginar_por_cursor(query, Aluno.nome, Aluno.id, request.args.get('cursor'),
+                                    per_page, chave_total=f'alunos:{search}')
+    else:
+        alunos = paginar(query.order_by(Aluno.nome), page, per_page, chave_total=f'alunos:{search}')
 
     return render_template('alunos/index.html', alunos=alunos, search=search)
 
+@bp.route('/importar', methods=['GET', 'POST'])
+@login_required
+def importar():
+    """Importa alunos em massa de um arquivo CSV ou NDJSON"""
+    resultado = None
+
+    if request.method == 'POST':
+        arquivo = request.files.get('arquivo')
+        if not arquivo or not arquivo.filename:
+            flash('Selecione um arquivo.', 'danger')
+            return redirect(url_for('alunos.importar'))
+
+        resultado = importar_arquivo('alunos', arquivo.stream, nome_arquivo=arquivo.filename,
+                                     lote=current_app.config['IMPORTACAO_LOTE'])
+        flash(f'{resultado.inseridos} alunos importados.', 'success' if resultado.inseridos else 'warning')
+
+    return render_template('importacao/form.html', titulo='Alunos', voltar='alunos.index',
+                           colunas=['matricula', 'nome', 'curso', 'idade', 'sexo'], resultado=resultado)
+
 @bp.route('/criar', methods=['GET', 'POST'])
 @login_required
 def criar():
@@ -53,10 +86,6 @@ def criar():
             flash('Matrícula e nome são obrigatórios.', 'danger')
             return redirect(url_for('alunos.criar'))
 
-        if Aluno.query.filter_by(matricula=matricula).first():
-            flash('Matrícula já cadastrada.', 'danger')
-            return redirect(url_for('alunos.criar'))
-
         # Criar aluno
         aluno = Aluno(
             matricula=matricula,
@@ -71,11 +100,15 @@ def criar():
             file = request.files['foto']
             if file and file.filename and allowed_file(file.filename):
                 filename = secure_filename(file.filename)
-                aluno.foto = file.read()
-                aluno.foto_filename = filename
+                if not salvar_foto(aluno, file.read(), filename):
+                    flash('A foto não é uma imagem válida ou é grande demais.', 'danger')
+                    return redirect(url_for('alunos.criar'))
 
         db.session.add(aluno)
-        db.session.commit()
+        # Matrícula repetida: o índice único recusa o INSERT
+        if not confirmar():
+            flash('Matrícula já cadastrada.', 'danger')
+            return redirect(url_for('alunos.criar'))
 
         flash(f'Aluno {nome} cadastrado com sucesso!', 'success')
         return redirect(url_for('alunos.index'))
@@ -100,12 +133,6 @@ def editar(id):
             flash('Matrícula e nome são obrigatórios.', 'danger')
             return redirect(url_for('alunos.editar', id=id))
 
-        # Verificar matrícula duplicada
-        existing = Aluno.query.filter_by(matricula=matricula).first()
-        if existing and existing.id != id:
-            flash('Matrícula já cadastrada para outro aluno.', 'danger')
-            return redirect(url_for('alunos.editar', id=id))
-
         # Atualizar dados
         aluno.matricula = matricula
         aluno.nome = nome
@@ -118,10 +145,14 @@ def editar(id):
             file = request.files['foto']
             if file and file.filename and allowed_file(file.filename):
                 filename = secure_filename(file.filename)
-                aluno.foto = file.read()
-                aluno.foto_filename = filename
+                if not salvar_foto(aluno, file.read(), filename):
+                    db.session.rollback()
+                    flash('A foto não é uma imagem válida ou é grande demais.', 'danger')
+                    return redirect(url_for('alunos.editar', id=id))
 
-        db.session.commit()
+        if not confirmar():
+            flash('Matrícula já cadastrada para outro aluno.', 'danger')
+            return redirect(url_for('alunos.editar', id=id))
 
         flash(f'Aluno {nome} atualizado com sucesso!', 'success')
         return redirect(url_for('alunos.index'))
@@ -141,22 +172,62 @@ def excluir(id):
     flash(f'Aluno {nome} excluído com sucesso!', 'success')
     return redirect(url_for('alunos.index'))
 
+@bp.route('/excluir-selecionados', methods=['POST'])
+@login_required
+def excluir_selecionados():
+    """Excluir os alunos marcados na listagem (e seus pets) com um único DELETE"""
+    ids = request.form.getlist('ids', type=int)
+    if not ids:
+        flash('Nenhum aluno selecionado.', 'warning')
+        return redirect(url_for('alunos.index'))
+
+    total = excluir_alunos(ids)
+    db.session.commit()
+
+    flash(f'{total} alunos excluídos com sucesso!', 'success')
+    return redirect(url_for('alunos.index'))
+
 @bp.route('/foto/<int:id>')
 @login_required
 def foto(id):
-    """Retorna a foto do aluno"""
-    aluno = Aluno.query.get_or_404(id)
+    """Retorna a foto do aluno (?size=avatar|card para miniaturas)"""
+    size = request.args.get('size')
+
+    # Apenas metadados; os bytes vêm do storage de fotos
+    aluno = db.session.query(
+        Aluno.foto_hash, Aluno.foto_filename, Aluno.updated_at
+    ).filter(Aluno.id == id).first_or_404()
+
+    # URL com a versão atual (?v=) pode ficar no cache do navegador
+    versao = Aluno.calcular_foto_versao(aluno.foto_hash, aluno.updated_at)
+    cache = dict(imutavel=request.args.get('v') == versao)
+    etag = gerar_etag(aluno.foto_hash or aluno.updated_at, size or 'original')
+    last_modified = None if aluno.foto_hash else aluno.updated_at
+
+    if nao_modificado(etag, last_modified):
+        return resposta_304(etag, last_modified, **cache)
 
-    if not aluno.foto:
+    if size:
+        caminho = caminho_miniatura(id, aluno.foto_hash, size)
+        if caminho:
+            response = send_file(caminho, mimetype='image/jpeg', conditional=False, etag=False)
+            return aplicar_cache(response, etag, last_modified, **cache)
+
+    conteudo = ler_foto(id, aluno.foto_hash)
+
+    if not conteudo:
         # Retornar imagem padrão
         return redirect(url_for('static', filename='img/no-photo.png'))
 
-    return send_file(
-        BytesIO(aluno.foto),
-        mimetype='image/jpeg',
+    filename = aluno.foto_filename or 'foto.jpg'
+    response = send_file(
+        BytesIO(conteudo),
+        mimetype=mimetypes.guess_type(filename)[0] or 'image/jpeg',
         as_attachment=False,
-        download_name=aluno.foto_filename or 'foto.jpg'
+        download_name=filename,
+        etag=False
     )
+    return aplicar_cache(response, etag, last_modified, **cache)
 
 @bp.route('/detalhes/<int:id>')
 @login_required
@@ -165,10 +236,46 @@ def detalhes(id):
     aluno = Aluno.query.get_or_404(id)
     return render_template('alunos/detalhes.html', aluno=aluno)
 
+@bp.route('/api/sugestoes')
+@login_required
+def sugestoes():
+    """API: alunos por prefixo do nome ou da matrícula (?q=, ?limite=)"""
+    termo = request.args.get('q', '').strip().lower()
+    limite = min(max(request.args.get('limite', 10, type=int), 1), SUGESTOES_LIMITE_MAX)
+
+    # Só os prefixos curtos (os mais pedidos e os que mais casam) vão para o
+    # cache; os longos são seletivos no índice e criariam uma chave por tecla
+    if len(termo) <= current_app.config['SUGESTOES_CACHE_CARACTERES']:
+        dados = memoizar(
+            f'sugestoes:alunos:{limite}:{termo}',
+            lambda: sugerir_alunos(termo, limite),
+            ttl=current_app.config['SUGESTOES_ALUNOS_TTL']
+        )
+    else:
+        dados = sugerir_alunos(termo, limite)
+
+    etag = gerar_etag('sugestoes', dados)
+    if nao_modificado(etag):
+        return resposta_304(etag)
+    return aplicar_cache(jsonify(dados), etag)
+
 @bp.route('/api/exportar')
 @login_required
 def exportar():
-    """Exportar dados dos alunos em JSON"""
-    alunos = Aluno.query.all()
-    data = [aluno.to_dict() for aluno in alunos]
-    return jsonify(data)
+    """Exportar dados dos alunos em JSON (?formato=ndjson, ?since=AAAA-MM-DDTHH:MM)"""
+    formato = request.args.get('formato', 'json')
+    if formato not in FORMATOS:
+        return jsonify({'erro': 'Formato inválido. Use json ou ndjson.'}), 400
+
+    try:
+        since = parse_since(request.args.get('since'))
+    except ValueError:
+        return jsonify({'erro': 'Parâmetro since inválido. Use o formato ISO 8601.'}), 400
+
+    total, ultimo_id, ultima_alteracao = versao_tabela(Aluno)
+    etag = gerar_etag('alunos', formato, since, total, ultimo_id, ultima_alteracao)
+
+    if nao_modificado(etag, ultima_alteracao):
+        return resposta_304(etag, ultima_alteracao)
+
+    return aplicar_cache(exportar_modelo(Aluno, formato, since), etag, ultima_alteracao)
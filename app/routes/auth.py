@@ -1,7 +1,8 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
 from flask_login import login_user, logout_user, login_required, current_user
 from app import db
 from app.models.user import User
+from app.services.banco import confirmar, existe
 from datetime import datetime
 
 bp = Blueprint('auth', __name__, url_prefix='/auth')
@@ -18,63 +19,37 @@ def login():
             password = request.form.get('password')
             remember = request.form.get('remember', False)
 
-            # Debug
-            print(f"\n{'='*60}")
-            print(f"DEBUG - Tentativa de login: username='{username}'")
-            print(f"{'='*60}")
-
             user = User.query.filter_by(username=username).first()
 
-            # Debug
-            if user:
-                print(f"DEBUG - Usuário encontrado: {user.username}")
-                print(f"DEBUG - Email: {user.email}")
-                print(f"DEBUG - Ativo: {user.ativo}")
-                print(f"DEBUG - Hash presente: {bool(user.password_hash)}")
-
-                print(f"DEBUG - Verificando senha...")
-                senha_valida = user.check_password(password)
-                print(f"DEBUG - Senha válida: {senha_valida}")
-            else:
-                print(f"DEBUG - Usuário '{username}' NÃO encontrado no banco!")
-
+            # Uma única verificação: o hash é a operação mais cara do login
             if user and user.check_password(password):
-                print(f"DEBUG - Autenticação OK! Verificando se está ativo...")
-
                 if not user.ativo:
-                    print(f"DEBUG - Usuário INATIVO!")
                     flash('Sua conta está desativada. Contate o administrador.', 'danger')
                     return redirect(url_for('auth.login'))
 
-                print(f"DEBUG - Atualizando último login...")
+                # Refaz o hash se o método/custo configurado mudou
+                if user.precisa_rehash():
+                    user.set_password(password)
+
                 # Atualizar último login
                 user.last_login = datetime.utcnow()
                 db.session.commit()
 
-                print(f"DEBUG - Fazendo login do usuário...")
                 login_user(user, remember=remember)
-                print(f"DEBUG - Login efetuado com sucesso!")
 
                 flash(f'Bem-vindo, {user.nome_completo or user.username}!', 'success')
 
                 # Redirecionar para página solicitada ou dashboard
                 next_page = request.args.get('next')
-                print(f"DEBUG - Redirecionando para dashboard...")
                 return redirect(next_page) if next_page else redirect(url_for('dashboard.index'))
             else:
                 if not user:
-                    print(f"DEBUG - FALHA: Usuário não encontrado")
                     flash('Usuário não encontrado.', 'danger')
                 else:
-                    print(f"DEBUG - FALHA: Senha incorreta")
                     flash('Senha incorreta.', 'danger')
 
-        except Exception as e:
-            print(f"\n{'='*60}")
-            print(f"ERRO DURANTE LOGIN: {str(e)}")
-            print(f"{'='*60}\n")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            current_app.logger.exception('Erro durante login', extra={'username': request.form.get('username')})
             flash('Erro ao processar login. Tente novamente.', 'danger')
 
     return render_template('auth/login.html')
@@ -109,20 +84,18 @@ def register():
             flash('As senhas não coincidem.', 'danger')
             return redirect(url_for('auth.register'))
 
-        if User.query.filter_by(username=username).first():
-            flash('Nome de usuário já existe.', 'danger')
-            return redirect(url_for('auth.register'))
-
-        if User.query.filter_by(email=email).first():
-            flash('Email já cadastrado.', 'danger')
-            return redirect(url_for('auth.register'))
-
         # Criar novo usuário
         user = User(username=username, email=email, nome_completo=nome_completo)
         user.set_password(password)
 
         db.session.add(user)
-        db.session.commit()
+        # Username e email são únicos no banco: só consulta qual deles se o INSERT falhar
+        if not confirmar():
+            if existe(User.username == username):
+                flash('Nome de usuário já existe.', 'danger')
+            else:
+                flash('Email já cadastrado.', 'danger')
+            return redirect(url_for('auth.register'))
 
         flash('Conta criada com sucesso! Faça login.', 'success')
         return redirect(url_for('auth.login'))
@@ -0,0 +1,28 @@
+from flask import Blueprint, current_app, jsonify, request, abort
+from flask_login import login_required, current_user
+from app.services.metricas import CAMPOS, resumo
+
+bp = Blueprint('metricas', __name__, url_prefix='/metricas')
+
+@bp.route('/')
+@login_required
+def index():
+    """Percentis de tempo, consultas SQL e bytes por endpoint (JSON)"""
+    if not current_app.config['METRICAS_ATIVAS']:
+        abort(404)
+    if current_user.username not in current_app.config['METRICAS_USUARIOS']:
+        abort(403)
+
+    # ?ordem=total_ms (padrão), sql_ms, consultas...: endpoints mais lentos primeiro
+    ordem = request.args.get('ordem') or 'total_ms'
+    if ordem not in CAMPOS:
+        return jsonify({'erro': f'Ordem inválida. Use {", ".join(CAMPOS)}.'}), 400
+
+    dados = resumo()
+    # Campos sem amostras (ex.: bytes de respostas em streaming) ficam de fora
+    endpoints = sorted(dados, key=lambda e: dados[e].get(ordem, {}).get('p90', 0), reverse=True)
+
+    return jsonify({
+        'ordem': ordem,
+        'endpoints': [{'endpoint': e, **dados[e]} for e in endpoints],
+    })
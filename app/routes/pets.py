@@ -1,12 +1,24 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
 from flask_login import login_required
 from app import db
 from app.models.pet import Pet
 from app.models.aluno import Aluno
+from sqlalchemy.orm import contains_eager
+from app.services.busca import get_busca
+from app.services.paginacao import paginar, paginar_por_cursor
+from app.services.banco import confirmar
+from app.services.cache import invalidar_ao_alterar
+from app.services.importacao import importar_arquivo
+from app.services.exclusao import excluir_pets
+from app.services.exportacao import FORMATOS, parse_since, exportar_modelo
+from app.services.cache_http import gerar_etag, nao_modificado, aplicar_cache, resposta_304, versao_tabela
 from datetime import datetime
 
 bp = Blueprint('pets', __name__, url_prefix='/pets')
 
+# Totais da listagem em cache, invalidados quando pets mudam
+invalidar_ao_alterar(Pet, 'total:pets:')
+
 @bp.route('/')
 @login_required
 def index():
@@ -16,21 +28,43 @@ def index():
 
     # Busca
     search = request.args.get('search', '')
-    query = Pet.query.join(Aluno)
+    # O JOIN já traz o dono: preenche pet.dono na mesma consulta
+    query = Pet.query.join(Pet.dono).options(
+        contains_eager(Pet.dono).load_only(Aluno.id, Aluno.nome)
+    )
 
     if search:
-        query = query.filter(
-            db.or_(
-                Pet.apelido.like(f'%{search}%'),
-                Pet.raca.like(f'%{search}%'),
-                Aluno.nome.like(f'%{search}%')
-            )
-        )
+        query = get_busca().filtrar_pets(query, search)
 
-    pets = query.order_by(Pet.apelido).paginate(page=page, per_page=per_page, error_out=False)
+    # ?modo=cursor: paginação por keyset em (apelido, id), sem OFFSET
+    modo = request.args.get('modo', current_app.config['PAGINACAO_MODO'])
+    if modo == 'cursor':
+        pets = paginar_por_cursor(query, Pet.apelido, Pet.id, request.args.get('cursor'),
+                                  per_page, chave_total=f'pets:{search}')
+    else:
+        pets = paginar(query.order_by(Pet.apelido), page, per_page, chave_total=f'pets:{search}')
 
     return render_template('pets/index.html', pets=pets, search=search)
 
+@bp.route('/importar', methods=['GET', 'POST'])
+@login_required
+def importar():
+    """Importa pets em massa de um arquivo CSV ou NDJSON"""
+    resultado = None
+
+    if request.method == 'POST':
+        arquivo = request.files.get('arquivo')
+        if not arquivo or not arquivo.filename:
+            flash('Selecione um arquivo.', 'danger')
+            return redirect(url_for('pets.importar'))
+
+        resultado = importar_arquivo('pets', arquivo.stream, nome_arquivo=arquivo.filename,
+                                     lote=current_app.config['IMPORTACAO_LOTE'])
+        flash(f'{resultado.inseridos} pets importados.', 'success' if resultado.inseridos else 'warning')
+
+    return render_template('importacao/form.html', titulo='Pets', voltar='pets.index',
+                           colunas=['apelido', 'raca', 'data_nascimento', 'matricula'], resultado=resultado)
+
 @bp.route('/criar', methods=['GET', 'POST'])
 @login_required
 def criar():
@@ -39,19 +73,13 @@ def criar():
         apelido = request.form.get('apelido')
         raca = request.form.get('raca')
         data_nascimento = request.form.get('data_nascimento')
-        aluno_id = request.form.get('aluno_id')
+        aluno_id = request.form.get('aluno_id', type=int)
 
         # Validações
         if not apelido or not aluno_id:
             flash('Apelido e dono são obrigatórios.', 'danger')
             return redirect(url_for('pets.criar'))
 
-        # Verificar se aluno existe
-        aluno = Aluno.query.get(aluno_id)
-        if not aluno:
-            flash('Aluno não encontrado.', 'danger')
-            return redirect(url_for('pets.criar'))
-
         # Criar pet
         pet = Pet(
             apelido=apelido,
@@ -67,13 +95,16 @@ def criar():
                 return redirect(url_for('pets.criar'))
 
         db.session.add(pet)
-        db.session.commit()
+        # Dono inexistente: a chave estrangeira recusa o INSERT
+        if not confirmar():
+            flash('Aluno não encontrado.', 'danger')
+            return redirect(url_for('pets.criar'))
 
         flash(f'Pet {apelido} cadastrado com sucesso!', 'success')
         return redirect(url_for('pets.index'))
 
-    alunos = Aluno.query.order_by(Aluno.nome).all()
-    return render_template('pets/form.html', pet=None, alunos=alunos)
+    # O dono é escolhido pelo autocompletar (alunos.sugestoes)
+    return render_template('pets/form.html', pet=None)
 
 @bp.route('/editar/<int:id>', methods=['GET', 'POST'])
 @login_required
@@ -85,19 +116,13 @@ def editar(id):
         apelido = request.form.get('apelido')
         raca = request.form.get('raca')
         data_nascimento = request.form.get('data_nascimento')
-        aluno_id = request.form.get('aluno_id')
+        aluno_id = request.form.get('aluno_id', type=int)
 
         # Validações
         if not apelido or not aluno_id:
             flash('Apelido e dono são obrigatórios.', 'danger')
             return redirect(url_for('pets.editar', id=id))
 
-        # Verificar se aluno existe
-        aluno = Aluno.query.get(aluno_id)
-        if not aluno:
-            flash('Aluno não encontrado.', 'danger')
-            return redirect(url_for('pets.editar', id=id))
-
         # Atualizar dados
         pet.apelido = apelido
         pet.raca = raca
@@ -110,13 +135,14 @@ def editar(id):
                 flash('Data de nascimento inválida.', 'danger')
                 return redirect(url_for('pets.editar', id=id))
 
-        db.session.commit()
+        if not confirmar():
+            flash('Aluno não encontrado.', 'danger')
+            return redirect(url_for('pets.editar', id=id))
 
         flash(f'Pet {apelido} atualizado com sucesso!', 'success')
         return redirect(url_for('pets.index'))
 
-    alunos = Aluno.query.order_by(Aluno.nome).all()
-    return render_template('pets/form.html', pet=pet, alunos=alunos)
+    return render_template('pets/form.html', pet=pet)
 
 @bp.route('/excluir/<int:id>', methods=['POST'])
 @login_required
@@ -131,6 +157,21 @@ def excluir(id):
     flash(f'Pet {apelido} excluído com sucesso!', 'success')
     return redirect(url_for('pets.index'))
 
+@bp.route('/excluir-selecionados', methods=['POST'])
+@login_required
+def excluir_selecionados():
+    """Excluir os pets marcados na listagem com um único DELETE"""
+    ids = request.form.getlist('ids', type=int)
+    if not ids:
+        flash('Nenhum pet selecionado.', 'warning')
+        return redirect(url_for('pets.index'))
+
+    total = excluir_pets(ids)
+    db.session.commit()
+
+    flash(f'{total} pets excluídos com sucesso!', 'success')
+    return redirect(url_for('pets.index'))
+
 @bp.route('/api/por-aluno/<int:aluno_id>')
 @login_required
 def api_por_aluno(aluno_id):
@@ -142,7 +183,20 @@ def api_por_aluno(aluno_id):
 @bp.route('/api/exportar')
 @login_required
 def exportar():
-    """Exportar dados dos pets em JSON"""
-    pets = Pet.query.all()
-    data = [pet.to_dict() for pet in pets]
-    return jsonify(data)
+    """Exportar dados dos pets em JSON (?formato=ndjson, ?since=AAAA-MM-DDTHH:MM)"""
+    formato = request.args.get('formato', 'json')
+    if formato not in FORMATOS:
+        return jsonify({'erro': 'Formato inválido. Use json ou ndjson.'}), 400
+
+    try:
+        since = parse_since(request.args.get('since'))
+    except ValueError:
+        return jsonify({'erro': 'Parâmetro since inválido. Use o formato ISO 8601.'}), 400
+
+    total, ultimo_id, ultima_alteracao = versao_tabela(Pet)
+    etag = gerar_etag('pets', formato, since, total, ultimo_id, ultima_alteracao)
+
+    if nao_modificado(etag, ultima_alteracao):
+        return resposta_304(etag, ultima_alteracao)
+
+    return aplicar_cache(exportar_modelo(Pet, formato, since), etag, ultima_alteracao)
@@ -0,0 +1,29 @@
+from flask import Blueprint, jsonify
+from app import db
+from app.services.banco import estatisticas_pool, verificar_banco
+
+bp = Blueprint('saude', __name__)
+
+@bp.route('/health/live')
+def live():
+    """Processo no ar (não consulta o banco)"""
+    return jsonify({'status': 'ok'})
+
+@bp.route('/health')
+def index():
+    """Pronto para receber requisições: banco (e réplica) acessível (503 se não)"""
+    ok, erro = verificar_banco()
+    dados = {
+        'banco': 'ok' if ok else erro,
+        'pool': estatisticas_pool(),
+    }
+
+    replica = db.engines.get('replica')
+    if replica is not None:
+        ok_replica, erro = verificar_banco(replica)
+        dados['replica'] = 'ok' if ok_replica else erro
+        dados['pool_replica'] = estatisticas_pool(replica)
+        ok = ok and ok_replica
+
+    dados['status'] = 'ok' if ok else 'erro'
+    return jsonify(dados), 200 if ok else 503
@@ -0,0 +1 @@
+# Serviços de apoio usados pelos blueprints
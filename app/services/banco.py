@@ -0,0 +1,172 @@
+"""
+Pool de conexões e verificação de saúde do banco.
+
+``PoolMedido`` é o ``QueuePool`` padrão do SQLAlchemy com contadores:
+conexões abertas, checkouts, tempo de espera por uma conexão (inclui o
+``pool_pre_ping`` e a abertura de conexões novas) e timeouts. O tamanho
+do pool, o overflow e o reciclo vêm de ``SQLALCHEMY_ENGINE_OPTIONS``
+(ver ``ProductionConfig``).
+
+``verificar_banco()`` faz um ``SELECT 1`` direto numa conexão do engine,
+sem sessão, e guarda o resultado por ``HEALTH_CACHE_TTL`` segundos: as
+sondas do balanceador não viram uma consulta por chamada.
+
+Nas gravações, as rotas contam com as restrições do banco (UNIQUE, FOREIGN
+KEY) em vez de consultar antes: ``confirmar()`` faz o commit e devolve
+False se o banco recusou; ``existe()`` é um ``EXISTS`` só de colunas,
+para quando é preciso saber qual restrição falhou.
+"""
+import sqlite3
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from app import db
+
+
+class EstatisticasPool:
+    """Contadores de uso de um pool, seguros para uso entre threads"""
+
+    def __init__(self):
+        self.conexoes_abertas = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.espera_total_ms = 0.0
+        self.espera_max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def registrar(self, espera_ms):
+        with self._lock:
+            self.checkouts += 1
+            self.espera_total_ms += espera_ms
+            self.espera_max_ms = max(self.espera_max_ms, espera_ms)
+
+    def timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def conexao_aberta(self):
+        with self._lock:
+            self.conexoes_abertas += 1
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'conexoes_abertas': self.conexoes_abertas,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'espera_media_ms': round(self.espera_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                'espera_max_ms': round(self.espera_max_ms, 3),
+            }
+
+
+class PoolMedido(QueuePool):
+    """QueuePool que mede quanto tempo cada checkout esperou"""
+
+    @property
+    def estatisticas(self):
+        if '_estatisticas' not in self.__dict__:
+            estatisticas = self._estatisticas = EstatisticasPool()
+            event.listen(self, 'connect', lambda *args: estatisticas.conexao_aberta())
+        return self._estatisticas
+
+    def recreate(self):
+        # dispose()/invalidação criam um pool novo; os contadores continuam
+        # (os listeners já são copiados pelo SQLAlchemy)
+        novo = super().recreate()
+        novo._estatisticas = self.estatisticas
+        return novo
+
+    def connect(self):
+        estatisticas = self.estatisticas
+        inicio = time.perf_counter()
+        try:
+            conexao = super().connect()
+        except exc.TimeoutError:
+            estatisticas.timeout()
+            raise
+        estatisticas.registrar((time.perf_counter() - inicio) * 1000)
+        return conexao
+
+
+@event.listens_for(Engine, 'connect')
+def _sqlite_chaves_estrangeiras(dbapi_connection, connection_record):
+    # SQLite só verifica FOREIGN KEY com o PRAGMA ligado (por conexão)
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+
+
+def confirmar():
+    """Commit; em violação de restrição faz rollback e devolve False"""
+    try:
+        db.session.commit()
+        return True
+    except exc.IntegrityError:
+        db.session.rollback()
+        return False
+
+
+def existe(*criterios):
+    """SELECT EXISTS(...) sem carregar linhas"""
+    return db.session.query(db.exists().where(*criterios)).scalar()
+
+
+def configurar_pool(app):
+    """Usa PoolMedido como pool padrão (antes de db.init_app)"""
+    opcoes = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    # SQLite em memória continua com StaticPool (Flask-SQLAlchemy troca a classe)
+    opcoes.setdefault('poolclass', PoolMedido)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = opcoes
+
+
+def estatisticas_pool(engine=None):
+    """Ocupação do pool (tamanho, em uso, overflow) e contadores de espera"""
+    pool = (engine or db.engine).pool
+    dados = {'classe': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        dados.update(
+            tamanho=pool.size(),
+            livres=pool.checkedin(),
+            em_uso=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    if isinstance(pool, PoolMedido):
+        dados.update(pool.estatisticas.to_dict())
+    return dados
+
+
+_ultima_verificacao = {}
+_lock_verificacao = threading.Lock()
+
+
+def verificar_banco(engine=None):
+    """
+    (ok, erro): SELECT 1 numa conexão do pool, sem sessão do ORM.
+    O resultado vale por HEALTH_CACHE_TTL segundos (por processo e banco).
+    """
+    engine = engine or db.engine
+    ttl = current_app.config['HEALTH_CACHE_TTL']
+    agora = time.monotonic()
+
+    with _lock_verificacao:
+        anterior = _ultima_verificacao.get(engine)
+        if anterior and agora - anterior[0] < ttl:
+            return anterior[1]
+
+    try:
+        with engine.connect() as conexao:
+            conexao.exec_driver_sql('SELECT 1')
+        resultado = (True, None)
+    except exc.SQLAlchemyError as e:
+        current_app.logger.warning('Banco indisponível: %s', e)
+        resultado = (False, type(e).__name__)
+
+    with _lock_verificacao:
+        _ultima_verificacao[engine] = (agora, resultado)
+    return resultado
@@ -0,0 +1,249 @@
+"""
+Busca textual de alunos e pets (parâmetro ``search`` das listagens).
+
+O backend depende do banco em uso:
+
+- MySQL: índices FULLTEXT em modo booleano (``+termo*``); a collation
+  utf8mb4_unicode_ci já ignora acentos;
+- SQLite: tabelas virtuais FTS5 com ``remove_diacritics``, mantidas por
+  triggers (usado em desenvolvimento e testes);
+- outros bancos, ou ``BUSCA_BACKEND=like``: ``LIKE '%termo%'``.
+
+Em todos os casos a matrícula é buscada por prefixo (``LIKE 'termo%'``),
+que usa o índice único, e os resultados vêm ordenados por relevância.
+"""
+import re
+import unicodedata
+
+from flask import current_app
+from sqlalchemy import DDL, event
+from sqlalchemy.dialects.mysql import match
+
+from app import db
+from app.models.aluno import Aluno
+from app.models.pet import Pet
+
+
+def normalizar(texto):
+    """Minúsculas e sem acentos ('João' -> 'joao')"""
+    decomposto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).lower()
+
+
+def tokenizar(texto):
+    """Palavras do termo de busca, sem acentos nem operadores"""
+    return re.findall(r'\w+', normalizar(texto))
+
+
+def _prefixo(termo):
+    """Padrão LIKE de prefixo com os curingas escapados"""
+    escapado = termo.strip().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'{escapado}%'
+
+
+class LikeBusca:
+    """Busca por LIKE (comportamento original, sem índice)"""
+
+    def filtrar_alunos(self, query, termo):
+        return query.filter(
+            db.or_(
+                Aluno.nome.like(f'%{termo}%'),
+                Aluno.matricula.like(f'%{termo}%'),
+                Aluno.curso.like(f'%{termo}%')
+            )
+        )
+
+    def filtrar_pets(self, query, termo):
+        """``query`` precisa ter o JOIN com alunos"""
+        return query.filter(
+            db.or_(
+                Pet.apelido.like(f'%{termo}%'),
+                Pet.raca.like(f'%{termo}%'),
+                Aluno.nome.like(f'%{termo}%')
+            )
+        )
+
+    def reindexar(self):
+        pass
+
+
+class MySQLBusca:
+    """FULLTEXT do MySQL (índices criados em create_tables.sql / DDL abaixo)"""
+
+    def _match(self, tokens, *colunas):
+        return match(*colunas, against=' '.join(f'+{t}*' for t in tokens)).in_boolean_mode()
+
+    def filtrar_alunos(self, query, termo):
+        tokens = tokenizar(termo)
+        if not tokens:
+            return query
+
+        relevancia = self._match(tokens, Aluno.nome, Aluno.curso)
+        # UNION em vez de OR: cada lado usa o próprio índice
+        ids = db.union(
+            db.select(Aluno.id).where(relevancia),
+            db.select(Aluno.id).where(Aluno.matricula.like(_prefixo(termo), escape='\\'))
+        )
+        return query.filter(Aluno.id.in_(ids)).order_by(relevancia.desc())
+
+    def filtrar_pets(self, query, termo):
+        """``query`` precisa ter o JOIN com alunos"""
+        tokens = tokenizar(termo)
+        if not tokens:
+            return query
+
+        relevancia_pet = self._match(tokens, Pet.apelido, Pet.raca)
+        relevancia_dono = self._match(tokens, Aluno.nome)
+        ids = db.union(
+            db.select(Pet.id).where(relevancia_pet),
+            db.select(Pet.id).join(Pet.dono).where(relevancia_dono)
+        )
+        return query.filter(Pet.id.in_(ids)).order_by((relevancia_pet + relevancia_dono).desc())
+
+    def reindexar(self):
+        """Cria os índices FULLTEXT que faltam (bancos anteriores à busca) e otimiza"""
+        existentes = set(db.session.execute(db.text(
+            "SELECT DISTINCT index_name FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND index_type = 'FULLTEXT'"
+        )).scalars())
+        for comandos in MYSQL_DDL.values():
+            for comando in comandos:
+                # 'CREATE FULLTEXT INDEX <nome> ON ...'
+                if comando.split()[3] not in existentes:
+                    db.session.execute(db.text(comando))
+        db.session.execute(db.text('OPTIMIZE TABLE alunos, pets'))
+
+
+class SQLiteBusca:
+    """FTS5 do SQLite (tabelas alunos_fts e pets_fts)"""
+
+    def _expressao(self, tokens, coluna=None):
+        termos = ' '.join(f'"{t}"*' for t in tokens)
+        return f'{coluna} : ({termos})' if coluna else termos
+
+    def _resultados(self, tabela, expressao, nome):
+        """Subconsulta (rowid, rank) da tabela FTS; rank menor = mais relevante"""
+        return db.select(
+            db.literal_column('rowid').label('id'),
+            db.literal_column('rank').label('rank')
+        ).select_from(db.text(tabela)).where(
+            db.text(f'{tabela} MATCH :{nome}').bindparams(**{nome: expressao})
+        ).subquery()
+
+    def filtrar_alunos(self, query, termo):
+        tokens = tokenizar(termo)
+        if not tokens:
+            return query
+
+        ft = self._resultados('alunos_fts', self._expressao(tokens), 'busca_alunos')
+        return query.outerjoin(ft, ft.c.id == Aluno.id).filter(
+            db.or_(
+                ft.c.id.isnot(None),
+                Aluno.matricula.like(_prefixo(termo), escape='\\')
+            )
+        ).order_by(db.func.coalesce(ft.c.rank, 0))
+
+    def filtrar_pets(self, query, termo):
+        tokens = tokenizar(termo)
+        if not tokens:
+            return query
+
+        ft_pet = self._resultados('pets_fts', self._expressao(tokens), 'busca_pets')
+        ft_dono = self._resultados('alunos_fts', self._expressao(tokens, 'nome'), 'busca_donos')
+        return query.outerjoin(ft_pet, ft_pet.c.id == Pet.id).outerjoin(
+            ft_dono, ft_dono.c.id == Pet.aluno_id
+        ).filter(
+            db.or_(ft_pet.c.id.isnot(None), ft_dono.c.id.isnot(None))
+        ).order_by(db.func.coalesce(ft_pet.c.rank, 0) + db.func.coalesce(ft_dono.c.rank, 0))
+
+    def reindexar(self):
+        for comandos in SQLITE_DDL.values():
+            for comando in comandos:
+                db.session.execute(db.text(comando))
+        db.session.execute(db.text("INSERT INTO alunos_fts(alunos_fts) VALUES ('rebuild')"))
+        db.session.execute(db.text("INSERT INTO pets_fts(pets_fts) VALUES ('rebuild')"))
+        db.session.commit()
+
+
+BACKENDS = {
+    'mysql': MySQLBusca,
+    'sqlite': SQLiteBusca,
+    'like': LikeBusca,
+}
+
+
+def get_busca():
+    """Backend de busca para o banco configurado (uma instância por app)"""
+    app = current_app._get_current_object()
+    if 'busca' not in app.extensions:
+        nome = app.config.get('BUSCA_BACKEND', 'auto')
+        if nome == 'auto':
+            nome = db.engine.dialect.name
+        app.extensions['busca'] = BACKENDS.get(nome, LikeBusca)()
+    return app.extensions['busca']
+
+
+def sugerir_alunos(termo, limite=10):
+    """
+    Alunos cujo nome ou matrícula começa com ``termo`` (autocompletar).
+
+    Só id, nome e matrícula; duas consultas por prefixo, cada uma no seu
+    índice (idx_nome e a matrícula única), em vez de um OR entre colunas.
+    """
+    colunas = (Aluno.id, Aluno.nome, Aluno.matricula)
+    padrao = _prefixo(termo)
+
+    linhas = db.session.execute(
+        db.select(*colunas).where(Aluno.nome.like(padrao, escape='\\'))
+        .order_by(Aluno.nome, Aluno.id).limit(limite)
+    ).all()
+    if termo.strip() and len(linhas) < limite:
+        linhas += db.session.execute(
+            db.select(*colunas).where(Aluno.matricula.like(padrao, escape='\\'))
+            .order_by(Aluno.matricula).limit(limite)
+        ).all()
+
+    vistos = set()
+    sugestoes = []
+    for linha in linhas:
+        if linha.id not in vistos:
+            vistos.add(linha.id)
+            sugestoes.append({'id': linha.id, 'nome': linha.nome, 'matricula': linha.matricula})
+    return sugestoes[:limite]
+
+# DDL dos índices de busca, executada junto com db.create_all()
+
+def _fts5(tabela, colunas):
+    lista = ', '.join(colunas)
+    novos = ', '.join(f'new.{c}' for c in colunas)
+    antigos = ', '.join(f'old.{c}' for c in colunas)
+    remover = f"INSERT INTO {tabela}_fts({tabela}_fts, rowid, {lista}) VALUES ('delete', old.id, {antigos});"
+    inserir = f'INSERT INTO {tabela}_fts(rowid, {lista}) VALUES (new.id, {novos});'
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {tabela}_fts USING fts5({lista}, "
+        f"content='{tabela}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        f'CREATE TRIGGER IF NOT EXISTS {tabela}_fts_ai AFTER INSERT ON {tabela} BEGIN {inserir} END',
+        f'CREATE TRIGGER IF NOT EXISTS {tabela}_fts_ad AFTER DELETE ON {tabela} BEGIN {remover} END',
+        f'CREATE TRIGGER IF NOT EXISTS {tabela}_fts_au AFTER UPDATE OF {lista} ON {tabela} BEGIN {remover} {inserir} END',
+    ]
+
+
+SQLITE_DDL = {
+    Aluno.__table__: _fts5('alunos', ['nome', 'curso']),
+    Pet.__table__: _fts5('pets', ['apelido', 'raca']),
+}
+
+MYSQL_DDL = {
+    Aluno.__table__: [
+        'CREATE FULLTEXT INDEX ft_alunos_busca ON alunos (nome, curso)',
+        'CREATE FULLTEXT INDEX ft_alunos_nome ON alunos (nome)',
+    ],
+    Pet.__table__: [
+        'CREATE FULLTEXT INDEX ft_pets_busca ON pets (apelido, raca)',
+    ],
+}
+
+for _dialeto, _ddl in (('mysql', MYSQL_DDL), ('sqlite', SQLITE_DDL)):
+    for _tabela, _comandos in _ddl.items():
+        for _comando in _comandos:
+            event.listen(_tabela, 'after_create', DDL(_comando).execute_if(dialect=_dialeto))
@@ -0,0 +1,177 @@
+"""
+Cache de dados calculados (estatísticas, totais das listagens).
+
+O backend vem de ``Config.CACHE_BACKEND``: ``memoria`` (dicionário com TTL
+e no máximo ``CACHE_MAX_ITENS`` chaves, um por processo) ou ``redis`` (compartilhado entre os workers; exige o
+pacote ``redis`` e ``CACHE_REDIS_URL``).
+
+``invalidar_ao_alterar`` liga um modelo a prefixos de chave: quando uma
+transação que inseriu, alterou ou excluiu linhas desse modelo é
+confirmada, as chaves com esses prefixos são removidas.
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.services.replica import ler_do_primario
+
+try:
+    import redis
+except ImportError:  # opcional: só necessário com CACHE_BACKEND=redis
+    redis = None
+
+
+class CacheMemoria:
+    """
+    Dicionário com TTL, seguro para uso entre threads.
+
+    Guarda no máximo ``max_itens`` chaves: ao passar do limite sai a usada
+    há mais tempo (LRU). Chaves por termo de busca não crescem sem limite.
+    """
+
+    def __init__(self, max_itens=1000):
+        self.max_itens = max_itens
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chave, padrao=None):
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is None:
+                return padrao
+            valor, expira = item
+            if expira is not None and expira < time.monotonic():
+                del self._dados[chave]
+                return padrao
+            self._dados.move_to_end(chave)
+            return valor
+
+    def set(self, chave, valor, ttl=None):
+        expira = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._dados[chave] = (valor, expira)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.max_itens:
+                self._dados.popitem(last=False)
+
+    def delete(self, chave):
+        with self._lock:
+            self._dados.pop(chave, None)
+
+    def delete_prefixo(self, prefixo):
+        with self._lock:
+            for chave in [c for c in self._dados if c.startswith(prefixo)]:
+                del self._dados[chave]
+
+    def clear(self):
+        with self._lock:
+            self._dados.clear()
+
+
+class CacheRedis:
+    """Cache compartilhado no Redis (valores serializados com pickle)"""
+
+    def __init__(self, url, namespace='escola:'):
+        if redis is None:
+            raise RuntimeError('CACHE_BACKEND=redis requer o pacote redis (pip install redis)')
+        self._redis = redis.Redis.from_url(url)
+        self.namespace = namespace
+
+    def get(self, chave, padrao=None):
+        valor = self._redis.get(self.namespace + chave)
+        return padrao if valor is None else pickle.loads(valor)
+
+    def set(self, chave, valor, ttl=None):
+        self._redis.set(self.namespace + chave, pickle.dumps(valor), ex=ttl or None)
+
+    def delete(self, chave):
+        self._redis.delete(self.namespace + chave)
+
+    def delete_prefixo(self, prefixo):
+        chaves = list(self._redis.scan_iter(match=f'{self.namespace}{prefixo}*'))
+        if chaves:
+            self._redis.delete(*chaves)
+
+    def clear(self):
+        self.delete_prefixo('')
+
+
+BACKENDS = {
+    'memoria': lambda app: CacheMemoria(app.config['CACHE_MAX_ITENS']),
+    'redis': lambda app: CacheRedis(app.config['CACHE_REDIS_URL']),
+}
+
+
+def get_cache():
+    """Cache da aplicação (um por app)"""
+    app = current_app._get_current_object()
+    if 'cache' not in app.extensions:
+        nome = app.config.get('CACHE_BACKEND', 'memoria')
+        if nome not in BACKENDS:
+            raise ValueError(f'CACHE_BACKEND inválido: {nome}')
+        app.extensions['cache'] = BACKENDS[nome](app)
+    return app.extensions['cache']
+
+
+def memoizar(chave, funcao, ttl=None):
+    """
+    Retorna o valor em cache ou calcula com funcao() e guarda.
+
+    O cálculo lê do primário, não da réplica: a invalidação acontece no
+    commit e a réplica pode ainda não ter a escrita.
+    """
+    cache = get_cache()
+    ausente = object()
+    valor = cache.get(chave, ausente)
+    if valor is ausente:
+        with ler_do_primario():
+            valor = funcao()
+        cache.set(chave, valor, ttl)
+    return valor
+
+
+# Invalidação por eventos do SQLAlchemy
+
+_PREFIXOS_POR_MAPPER = {}
+
+
+def _marcar(session, mapper):
+    prefixos = _PREFIXOS_POR_MAPPER.get(mapper.class_)
+    if session is not None and prefixos:
+        session.info.setdefault('cache_invalidar', set()).update(prefixos)
+
+
+def invalidar_ao_alterar(modelo, *prefixos):
+    """Remove as chaves com esses prefixos após o commit de alterações no modelo"""
+    if modelo not in _PREFIXOS_POR_MAPPER:
+        _PREFIXOS_POR_MAPPER[modelo] = set()
+        for nome in ('after_insert', 'after_update', 'after_delete'):
+            event.listen(modelo, nome, lambda mapper, conn, alvo: _marcar(object_session(alvo), mapper))
+    _PREFIXOS_POR_MAPPER[modelo].update(prefixos)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _bulk(orm_execute_state):
+    """INSERT/UPDATE/DELETE em massa (session.execute(update(Modelo)...)) não disparam eventos de mapper"""
+    estado = orm_execute_state
+    if (estado.is_insert or estado.is_update or estado.is_delete) and estado.bind_mapper:
+        _marcar(estado.session, estado.bind_mapper)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidar(session):
+    prefixos = session.info.pop('cache_invalidar', None)
+    if prefixos and has_app_context():
+        cache = get_cache()
+        for prefixo in prefixos:
+            cache.delete_prefixo(prefixo)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar(session):
+    session.info.pop('cache_invalidar', None)
@@ -0,0 +1,82 @@
+"""
+Cache HTTP condicional (ETag / Last-Modified / 304).
+
+As rotas calculam o validador a partir de metadados baratos (hash da foto,
+``updated_at``, contagem da tabela) e só carregam o conteúdo quando o
+navegador não tem a versão atual.
+"""
+import hashlib
+from datetime import timezone
+
+from flask import request, current_app
+
+from app import db
+
+
+def gerar_etag(*partes):
+    """ETag forte a partir de partes arbitrárias"""
+    texto = '-'.join(str(p) for p in partes)
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()
+
+
+def _utc(data):
+    """Datas do banco são UTC sem timezone; Werkzeug compara com aware"""
+    if data is None:
+        return None
+    if data.tzinfo is None:
+        data = data.replace(tzinfo=timezone.utc)
+    return data.replace(microsecond=0)
+
+
+def nao_modificado(etag, last_modified=None):
+    """Indica se o cliente já tem a versão atual (If-None-Match / If-Modified-Since)"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+
+    last_modified = _utc(last_modified)
+    if last_modified and request.if_modified_since:
+        return last_modified <= request.if_modified_since
+
+    return False
+
+
+def aplicar_cache(response, etag, last_modified=None, max_age=0, imutavel=False):
+    """Define ETag, Last-Modified e Cache-Control (sempre privado: rotas autenticadas)"""
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = _utc(last_modified)
+    else:
+        # send_file usa o mtime do arquivo; o validador aqui é só o ETag
+        response.headers.pop('Last-Modified', None)
+
+    response.cache_control.private = True
+    response.cache_control.no_cache = None
+    if imutavel:
+        response.cache_control.max_age = current_app.config['HTTP_CACHE_MAX_AGE_IMUTAVEL']
+        response.cache_control.immutable = True
+    elif max_age:
+        response.cache_control.max_age = max_age
+    else:
+        # Sempre revalidar, mas aceitar 304
+        response.cache_control.no_cache = True
+    return response
+
+
+def resposta_304(etag, last_modified=None, **kwargs):
+    """Resposta 304 sem corpo, com os mesmos cabeçalhos de cache"""
+    response = current_app.response_class(status=304)
+    return aplicar_cache(response, etag, last_modified, **kwargs)
+
+
+def versao_tabela(modelo):
+    """
+    Versão dos dados de uma tabela: (total, maior id, último updated_at).
+
+    Uma única consulta agregada, sem ler as linhas; muda em qualquer
+    inserção, alteração ou exclusão.
+    """
+    return db.session.query(
+        db.func.count(modelo.id),
+        db.func.max(modelo.id),
+        db.func.max(modelo.updated_at)
+    ).one()
@@ -0,0 +1,169 @@
+"""
+Contagem de comandos SQL por requisição.
+
+``ContadorConsultas`` registra cada comando enviado ao banco enquanto
+estiver ativo. ``verificar_rotas`` usa o contador para comparar as rotas
+GET com o orçamento em ``ORCAMENTO_CONSULTAS`` e detectar N+1 (ver
+tests/test_consultas.py e ``flask verificar-consultas``). ``verificar_indices`` roda o EXPLAIN de cada
+SELECT dessas rotas e aponta as varreduras completas de tabela (ver
+tests/test_consultas.py e ``flask verificar-indices``).
+"""
+import re
+
+from flask import url_for
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import db
+from app.services.cache import get_cache
+
+# Comandos SQL de cada rota, com o cache vazio (inclui o carregamento do
+# usuário logado). Valores exatos e constantes: não podem crescer com o
+# número de linhas (ver tests/test_consultas.py).
+ORCAMENTO_CONSULTAS = {
+    'dashboard.index': 6,
+    'alunos.index': 3,
+    'alunos.criar': 1,
+    'pets.index': 3,
+    'pets.criar': 1,
+    'relatorios.index': 1,
+    'relatorios.estatisticas': 2,
+    'relatorios.mestre_detalhe': 4,
+}
+
+
+# Rotas conferidas só pelo EXPLAIN: variações de parâmetros das listagens
+ROTAS_INDICES = [
+    ('alunos.index', {'modo': 'cursor'}),
+    ('pets.index', {'modo': 'cursor'}),
+    ('alunos.sugestoes', {'q': 'a'}),
+    ('alunos.exportar', {'since': '2000-01-01T00:00:00'}),
+    ('pets.exportar', {'since': '2000-01-01T00:00:00'}),
+]
+
+# Tabelas pequenas por construção (uma linha por valor distinto): varrer é barato
+TABELAS_PEQUENAS = {'estatisticas'}
+
+
+class ContadorConsultas:
+    """
+    Context manager que registra os comandos SQL executados.
+
+    Sem engine, escuta todos (primário e réplica). ``execucoes`` guarda
+    (engine, comando, parâmetros) de cada comando, para o EXPLAIN.
+    """
+
+    def __init__(self, engine=None):
+        self.engine = engine
+        self.comandos = []
+        self.execucoes = []
+
+    def _registrar(self, conn, cursor, statement, parameters, context, executemany):
+        self.comandos.append(statement)
+        if not executemany:
+            self.execucoes.append((conn.engine, statement, parameters))
+
+    def __enter__(self):
+        event.listen(self.engine or Engine, 'before_cursor_execute', self._registrar)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine or Engine, 'before_cursor_execute', self._registrar)
+
+    @property
+    def total(self):
+        return len(self.comandos)
+
+
+def cliente_autenticado(app, usuario):
+    """Test client com a sessão do Flask-Login já preenchida"""
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(usuario.id)
+        sess['_fresh'] = True
+    return client
+
+
+def verificar_rotas(app, usuario, orcamento=None):
+    """
+    Executa cada rota do orçamento e conta os comandos SQL.
+
+    Retorna uma lista de (endpoint, status, total, esperado).
+    """
+    orcamento = orcamento or ORCAMENTO_CONSULTAS
+    client = cliente_autenticado(app, usuario)
+    resultados = []
+
+    for endpoint, esperado in orcamento.items():
+        with app.test_request_context():
+            url = url_for(endpoint)
+        # Contexto novo: sessão e g limpos, como em uma requisição real; sem
+        # cache, para a contagem não depender das requisições anteriores
+        with app.app_context():
+            get_cache().clear()
+            with ContadorConsultas() as contador:
+                response = client.get(url)
+        resultados.append((endpoint, response.status_code, contador.total, esperado))
+
+    return resultados
+
+
+def _varreduras(engine, statement, parameters):
+    """Tabelas lidas por inteiro no plano do comando"""
+    with engine.connect() as conn:
+        if engine.dialect.name == 'sqlite':
+            plano = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)
+            encontradas = [re.fullmatch(r'SCAN (\w+)', linha.detail) for linha in plano]
+            tabelas = [m.group(1) for m in encontradas if m]
+        elif engine.dialect.name == 'mysql':
+            plano = conn.exec_driver_sql('EXPLAIN ' + statement, parameters).mappings()
+            tabelas = [linha['table'] for linha in plano if linha['type'] == 'ALL']
+        else:
+            raise ValueError(f'EXPLAIN não suportado para {engine.dialect.name}')
+    # Tabelas derivadas (subconsultas) e tabelas pequenas não contam
+    return sorted({t for t in tabelas if t in db.metadata.tables and t not in TABELAS_PEQUENAS})
+
+
+def _analisar(origem, status, contador):
+    varreduras = []
+    for engine, statement, parameters in contador.execucoes:
+        if statement.lstrip().upper().startswith('SELECT'):
+            for tabela in _varreduras(engine, statement, parameters):
+                varreduras.append((tabela, statement))
+    return origem, status, varreduras
+
+
+def verificar_indices(app, usuario):
+    """
+    Executa as rotas do orçamento (e ROTAS_INDICES) e as agregações das
+    estatísticas, e roda o EXPLAIN de cada SELECT.
+
+    Retorna uma lista de (origem, status, varreduras), com varreduras =
+    [(tabela, comando), ...] para cada leitura completa de tabela. Rode
+    contra um banco populado: com tabelas vazias o otimizador pode
+    preferir a varredura mesmo havendo índice.
+    """
+    from app.services.estatisticas import consultas_estatisticas
+
+    client = cliente_autenticado(app, usuario)
+    rotas = [(endpoint, {}) for endpoint in ORCAMENTO_CONSULTAS] + ROTAS_INDICES
+    resultados = []
+
+    for endpoint, args in rotas:
+        with app.test_request_context():
+            url = url_for(endpoint, **args)
+        with app.app_context():
+            # Sem cache: as consultas precisam chegar ao banco
+            get_cache().clear()
+            with ContadorConsultas() as contador:
+                response = client.get(url)
+                response.get_data()  # exportações são geradas em streaming
+            resultados.append(_analisar(url, response.status_code, contador))
+
+    with app.app_context():
+        for tipo, consulta in consultas_estatisticas().items():
+            with ContadorConsultas() as contador:
+                db.session.execute(consulta).all()
+            resultados.append(_analisar(f'estatisticas:{tipo}', 200, contador))
+
+    return resultados
@@ -0,0 +1,286 @@
+"""
+Estatísticas do dashboard e da página de estatísticas.
+
+O dashboard é calculado uma vez e servido do cache, invalidado quando
+uma transação altera alunos ou pets (ver ``invalidar_ao_alterar``) e
+expirado após ``DASHBOARD_CACHE_TTL`` segundos como garantia para
+alterações feitas fora da aplicação.
+
+A página de estatísticas lê a tabela ``estatisticas``, mantida a cada
+escrita (ver abaixo). Exclusões que o ORM não vê linha a linha (cascata
+do banco, DELETE em massa) são descontadas antes por ``descontar_alunos`` e
+``descontar_pets``, com uma consulta agregada; o DELETE em massa
+(``query.delete()``, ``session.execute(delete(Aluno))``) chama as duas
+sozinho. A reconstrução completa roda na fila de relatórios
+(tarefa ``estatisticas``) ou pelo comando ``flask reconstruir-estatisticas``.
+"""
+from collections import Counter
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models.aluno import Aluno
+from app.models.pet import Pet
+from app.models.estatistica import Estatistica
+from app.services.cache import memoizar, invalidar_ao_alterar
+from app.services.cache_http import gerar_etag, versao_tabela
+from app.services.tarefas import registrar_tipo
+
+invalidar_ao_alterar(Aluno, 'dashboard')
+invalidar_ao_alterar(Pet, 'dashboard')
+
+
+def _calcular_dashboard():
+    alunos_por_curso = db.session.query(
+        Aluno.curso,
+        db.func.count(Aluno.id)
+    ).group_by(Aluno.curso).all()
+
+    alunos_por_sexo = db.session.query(
+        Aluno.sexo,
+        db.func.count(Aluno.id)
+    ).group_by(Aluno.sexo).all()
+
+    media_idade = db.session.query(db.func.avg(Aluno.idade)).scalar()
+
+    # Só as colunas exibidas (a foto nunca é lida)
+    ultimos_alunos = db.session.query(
+        Aluno.matricula, Aluno.nome, Aluno.curso, Aluno.idade, Aluno.created_at
+    ).order_by(Aluno.created_at.desc()).limit(5).all()
+
+    return {
+        'total_alunos': sum(total for _, total in alunos_por_curso),
+        'total_pets': db.session.query(db.func.count(Pet.id)).scalar(),
+        'media_idade': round(float(media_idade), 1) if media_idade else 0,
+        'alunos_por_curso': [tuple(linha) for linha in alunos_por_curso],
+        'alunos_por_sexo': [tuple(linha) for linha in alunos_por_sexo],
+        'ultimos_alunos': [linha._asdict() for linha in ultimos_alunos],
+    }
+
+
+def dados_dashboard():
+    """Totais, distribuições e últimos alunos cadastrados"""
+    return memoizar('dashboard', _calcular_dashboard, ttl=current_app.config['DASHBOARD_CACHE_TTL'])
+
+
+# Tabela de estatísticas (relatorios.estatisticas)
+#
+# Cada linha guarda a contagem de um valor (tipo, chave). As contagens são
+# ajustadas na mesma transação que insere, altera ou exclui o aluno/pet,
+# e podem ser refeitas do zero com ``flask reconstruir-estatisticas``.
+
+def faixa_idade(idade):
+    """Mesmas faixas do relatório original"""
+    if idade is None:
+        return None
+    if idade < 18:
+        return 'Menor de 18'
+    if idade <= 25:
+        return '18-25'
+    if idade <= 35:
+        return '26-35'
+    return 'Maior de 35'
+
+
+def _chaves_aluno(curso, sexo, idade):
+    chaves = [('curso', curso or ''), ('sexo', sexo or '')]
+    faixa = faixa_idade(idade)
+    if faixa:
+        chaves.append(('faixa_idade', faixa))
+    return chaves
+
+
+def _chaves_pet(raca):
+    return [('raca', raca or '')]
+
+
+def _ajustar(conn, chaves, delta):
+    """Soma delta às contagens (upsert), na conexão da transação corrente"""
+    tabela = Estatistica.__table__
+    agora = datetime.utcnow()
+    for tipo, chave in chaves:
+        valores = dict(tipo=tipo, chave=chave[:100], total=delta, atualizado_em=agora)
+        if conn.dialect.name == 'mysql':
+            stmt = mysql_insert(tabela).values(**valores)
+            stmt = stmt.on_duplicate_key_update(total=tabela.c.total + delta, atualizado_em=agora)
+        elif conn.dialect.name == 'sqlite':
+            stmt = sqlite_insert(tabela).values(**valores).on_conflict_do_update(
+                index_elements=['tipo', 'chave'],
+                set_={'total': tabela.c.total + delta, 'atualizado_em': agora}
+            )
+        else:
+            resultado = conn.execute(
+                tabela.update()
+                .where(tabela.c.tipo == tipo, tabela.c.chave == valores['chave'])
+                .values(total=tabela.c.total + delta, atualizado_em=agora)
+            )
+            if resultado.rowcount:
+                continue
+            stmt = tabela.insert().values(**valores)
+        conn.execute(stmt)
+
+
+def _descontar(conn, contagens):
+    for chave, total in contagens.items():
+        _ajustar(conn, [chave], -total)
+
+
+def descontar_pets(conn, criterio):
+    """Tira das contagens por raça os pets selecionados (antes do DELETE)"""
+    contagens = Counter()
+    linhas = conn.execute(db.select(Pet.raca, db.func.count()).where(criterio).group_by(Pet.raca))
+    for raca, total in linhas:
+        contagens.update({chave: total for chave in _chaves_pet(raca)})
+    _descontar(conn, contagens)
+
+
+def descontar_alunos(conn, criterio):
+    """Tira das contagens os alunos selecionados e os pets deles (antes do DELETE)"""
+    contagens = Counter()
+    for curso, sexo, idade in conn.execute(db.select(Aluno.curso, Aluno.sexo, Aluno.idade).where(criterio)):
+        contagens.update(_chaves_aluno(curso, sexo, idade))
+    _descontar(conn, contagens)
+    descontar_pets(conn, Pet.aluno_id.in_(db.select(Aluno.id).where(criterio)))
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _delete_em_massa(orm_execute_state):
+    """DELETE em massa não dispara eventos de mapper: desconta antes de executar"""
+    estado = orm_execute_state
+    if not estado.is_delete or estado.bind_mapper is None:
+        return
+    criterio = estado.statement.whereclause
+    if criterio is None:
+        criterio = db.true()
+    if estado.bind_mapper.class_ is Aluno:
+        descontar_alunos(estado.session.connection(), criterio)
+    elif estado.bind_mapper.class_ is Pet:
+        descontar_pets(estado.session.connection(), criterio)
+
+
+def _anterior(alvo, campo):
+    """Valor do campo antes da alteração pendente"""
+    historico = inspect(alvo).attrs[campo].history
+    return historico.deleted[0] if historico.deleted else getattr(alvo, campo)
+
+
+@event.listens_for(Aluno, 'after_insert')
+def _aluno_inserido(mapper, conn, aluno):
+    _ajustar(conn, _chaves_aluno(aluno.curso, aluno.sexo, aluno.idade), 1)
+
+
+@event.listens_for(Aluno, 'before_delete')
+def _aluno_excluindo(mapper, conn, aluno):
+    # Pets não carregados são apagados pela cascata do banco (passive_deletes),
+    # sem eventos; os carregados já foram excluídos pelo ORM neste flush
+    descontar_pets(conn, Pet.aluno_id == aluno.id)
+
+
+@event.listens_for(Aluno, 'after_delete')
+def _aluno_excluido(mapper, conn, aluno):
+    _ajustar(conn, _chaves_aluno(_anterior(aluno, 'curso'), _anterior(aluno, 'sexo'), _anterior(aluno, 'idade')), -1)
+
+
+@event.listens_for(Aluno, 'after_update')
+def _aluno_alterado(mapper, conn, aluno):
+    antes = _chaves_aluno(_anterior(aluno, 'curso'), _anterior(aluno, 'sexo'), _anterior(aluno, 'idade'))
+    depois = _chaves_aluno(aluno.curso, aluno.sexo, aluno.idade)
+    _ajustar(conn, [c for c in antes if c not in depois], -1)
+    _ajustar(conn, [c for c in depois if c not in antes], 1)
+
+
+@event.listens_for(Pet, 'after_insert')
+def _pet_inserido(mapper, conn, pet):
+    _ajustar(conn, _chaves_pet(pet.raca), 1)
+
+
+@event.listens_for(Pet, 'after_delete')
+def _pet_excluido(mapper, conn, pet):
+    _ajustar(conn, _chaves_pet(_anterior(pet, 'raca')), -1)
+
+
+@event.listens_for(Pet, 'after_update')
+def _pet_alterado(mapper, conn, pet):
+    antes, depois = _chaves_pet(_anterior(pet, 'raca')), _chaves_pet(pet.raca)
+    if antes != depois:
+        _ajustar(conn, antes, -1)
+        _ajustar(conn, depois, 1)
+
+
+def consultas_estatisticas():
+    """Agregações que recalculam cada tipo de contagem, por tipo"""
+    faixa = db.case(
+        (Aluno.idade < 18, 'Menor de 18'),
+        (Aluno.idade.between(18, 25), '18-25'),
+        (Aluno.idade.between(26, 35), '26-35'),
+        (Aluno.idade > 35, 'Maior de 35')
+    )
+    return {
+        'curso': db.select(db.func.coalesce(Aluno.curso, ''), db.func.count(Aluno.id)).group_by(Aluno.curso),
+        'sexo': db.select(db.func.coalesce(Aluno.sexo, ''), db.func.count(Aluno.id)).group_by(Aluno.sexo),
+        'faixa_idade': db.select(faixa, db.func.count(Aluno.id)).where(Aluno.idade.isnot(None)).group_by(faixa),
+        'raca': db.select(db.func.coalesce(Pet.raca, ''), db.func.count(Pet.id)).group_by(Pet.raca),
+    }
+
+
+def reconstruir_estatisticas():
+    """Recalcula todas as contagens a partir das tabelas de alunos e pets"""
+    agora = datetime.utcnow()
+    linhas = []
+    for tipo, consulta in consultas_estatisticas().items():
+        for chave, total in db.session.execute(consulta):
+            linhas.append(dict(tipo=tipo, chave=chave[:100], total=total, atualizado_em=agora))
+
+    db.session.execute(db.delete(Estatistica))
+    if linhas:
+        db.session.execute(db.insert(Estatistica), linhas)
+    db.session.commit()
+    return len(linhas)
+
+
+def versao_estatisticas():
+    return gerar_etag('estatisticas', *versao_tabela(Aluno), *versao_tabela(Pet))[:16]
+
+
+def _tarefa_estatisticas(versao):
+    """Tarefa da fila: reconstrói a tabela (não gera arquivo)"""
+    reconstruir_estatisticas()
+
+
+registrar_tipo('estatisticas', _tarefa_estatisticas, versao_estatisticas, endpoint='relatorios.estatisticas')
+
+
+def dados_estatisticas(reconstruir=True):
+    """
+    Contagens da tabela de estatísticas, no formato usado pelo template.
+
+    Se a tabela ainda não foi populada (banco anterior a ela), reconstrói
+    na hora ou, com ``reconstruir=False``, retorna ``pendente=True``.
+    """
+    linhas = db.session.query(Estatistica.tipo, Estatistica.chave, Estatistica.total, Estatistica.atualizado_em).filter(
+        Estatistica.total > 0
+    ).all()
+
+    pendente = not linhas and db.session.query(Aluno.id).limit(1).first() is not None
+    if pendente and reconstruir:
+        reconstruir_estatisticas()
+        return dados_estatisticas()
+
+    por_tipo = {'curso': [], 'sexo': [], 'faixa_idade': [], 'raca': []}
+    for tipo, chave, total, _ in linhas:
+        por_tipo[tipo].append((chave or None, total))
+
+    ordem_faixas = ['Menor de 18', '18-25', '26-35', 'Maior de 35']
+    return {
+        'alunos_por_curso': sorted(por_tipo['curso'], key=lambda l: l[0] or ''),
+        'alunos_por_sexo': sorted(por_tipo['sexo'], key=lambda l: l[0] or ''),
+        'distribuicao_idade': sorted(por_tipo['faixa_idade'], key=lambda l: ordem_faixas.index(l[0])),
+        'pets_por_raca': sorted(por_tipo['raca'], key=lambda l: (-l[1], l[0] or ''))[:10],
+        'gerado_em': max((l.atualizado_em for l in linhas), default=None),
+        'pendente': pendente,
+    }
@@ -0,0 +1,23 @@
+"""
+Exclusão em massa de alunos e pets (seleção múltipla nas listagens).
+
+Um único ``DELETE ... WHERE id IN (...)`` por operação; os pets dos alunos
+excluídos saem pela cascata do banco (``ON DELETE CASCADE``). Como nenhum
+dos dois passa pelos eventos de mapper, as contagens da tabela
+``estatisticas`` são descontadas antes, com uma consulta agregada, e o
+cache é invalidado, ambos pelo evento de DELETE em massa
+(``services.estatisticas`` e ``services.cache``).
+"""
+from app import db
+from app.models.aluno import Aluno
+from app.models.pet import Pet
+
+
+def excluir_alunos(ids):
+    """Exclui os alunos (e seus pets); retorna quantos alunos foram excluídos"""
+    return db.session.execute(db.delete(Aluno).where(Aluno.id.in_(ids))).rowcount
+
+
+def excluir_pets(ids):
+    """Exclui os pets; retorna quantos foram excluídos"""
+    return db.session.execute(db.delete(Pet).where(Pet.id.in_(ids))).rowcount
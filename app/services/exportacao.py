@@ -0,0 +1,99 @@
+"""
+Exportação em streaming (JSON ou NDJSON).
+
+As linhas são lidas em lotes por chave (``id > ultimo_id``), só com as
+colunas exportadas, e escritas na resposta à medida que chegam. A memória
+usada não depende do tamanho da tabela.
+"""
+import json
+from datetime import datetime
+
+from flask import Response, current_app, stream_with_context
+
+from app import db
+
+FORMATOS = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def parse_since(valor):
+    """Converte o parâmetro since (ISO 8601, UTC) ou levanta ValueError"""
+    if not valor:
+        return None
+    data = datetime.fromisoformat(valor)
+    if data.tzinfo is not None:
+        data = (data - data.utcoffset()).replace(tzinfo=None)
+    return data
+
+
+def iterar_em_lotes(colunas, chave, filtros=(), lote=1000, desempate=None):
+    """
+    Percorre a consulta em lotes por chave crescente, sem OFFSET.
+
+    Se a chave não for única, ``desempate`` (ex.: o id) completa a
+    ordenação: o lote seguinte começa em ``(chave, desempate) > último``.
+    As duas colunas precisam estar em ``colunas``.
+    """
+    ultimo = None
+    ordem = [chave] if desempate is None else [chave, desempate]
+    while True:
+        consulta = db.select(*colunas).where(*filtros).order_by(*ordem).limit(lote)
+        if ultimo is not None:
+            if desempate is None:
+                consulta = consulta.where(chave > ultimo[0])
+            else:
+                consulta = consulta.where(db.or_(
+                    chave > ultimo[0],
+                    db.and_(chave == ultimo[0], desempate > ultimo[1])
+                ))
+
+        linhas = db.session.execute(consulta).all()
+        if not linhas:
+            break
+
+        yield from linhas
+
+        if len(linhas) < lote:
+            break
+        ultimo = [getattr(linhas[-1], c.key) for c in ordem]
+
+
+def _gerar(linhas, serializar, formato):
+    if formato == 'ndjson':
+        for linha in linhas:
+            yield json.dumps(serializar(linha)) + '\n'
+        return
+
+    yield '['
+    primeiro = True
+    for linha in linhas:
+        yield ('' if primeiro else ',') + json.dumps(serializar(linha))
+        primeiro = False
+    yield ']\n'
+
+
+def exportar_modelo(modelo, formato='json', since=None):
+    """
+    Resposta em streaming com todas as linhas do modelo.
+
+    ``modelo`` precisa expor ``colunas_dict()`` e ``serializar()``;
+    ``since`` restringe às linhas alteradas a partir dessa data (em ordem
+    de alteração; sem ``since``, em ordem de id).
+    """
+    if since is None:
+        linhas = iterar_em_lotes(modelo.colunas_dict(), modelo.id, lote=current_app.config['EXPORTACAO_LOTE'])
+    else:
+        # Em ordem de alteração: percorre o índice de updated_at em vez da tabela
+        linhas = iterar_em_lotes(
+            modelo.colunas_dict(),
+            modelo.updated_at,
+            [modelo.updated_at >= since],
+            lote=current_app.config['EXPORTACAO_LOTE'],
+            desempate=modelo.id
+        )
+    return Response(
+        stream_with_context(_gerar(linhas, modelo.serializar, formato)),
+        mimetype=FORMATOS[formato]
+    )
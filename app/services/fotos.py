@@ -0,0 +1,274 @@
+"""
+Armazenamento das fotos dos alunos.
+
+As fotos podem ficar em disco, endereçadas pelo SHA-256 do conteúdo
+(``ArquivoFotoStorage``), ou na coluna BLOB ``alunos.foto``
+(``BancoFotoStorage``), mantida por compatibilidade com bancos antigos.
+O backend usado para gravar vem de ``Config.FOTO_STORAGE``; a leitura
+sempre procura primeiro o arquivo e depois o BLOB, para que bancos em
+migração continuem funcionando.
+
+As miniaturas (``Config.FOTO_MINIATURAS``) são geradas uma única vez, no
+upload, e ficam sempre em disco ao lado do original, como JPEG. Uploads
+que não são imagens, ou com mais de ``Config.FOTO_MAX_PIXELS`` pixels,
+são recusados antes de gravar qualquer arquivo.
+"""
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+
+from flask import current_app
+
+from app import db
+from app.models.aluno import Aluno
+
+
+def calcular_hash(dados):
+    """Retorna o SHA-256 (hex) do conteúdo da foto"""
+    return hashlib.sha256(dados).hexdigest()
+
+
+class FotoStorage:
+    """Interface dos backends de armazenamento de fotos"""
+
+    def salvar(self, aluno, dados):
+        """Grava a foto e atualiza os metadados do aluno"""
+        raise NotImplementedError
+
+    def ler(self, aluno_id, foto_hash):
+        """Retorna os bytes da foto ou None"""
+        raise NotImplementedError
+
+
+class ArquivoFotoStorage(FotoStorage):
+    """Fotos em disco, endereçadas pelo hash do conteúdo"""
+
+    def __init__(self, pasta):
+        self.pasta = pasta
+
+    def caminho(self, foto_hash):
+        """Caminho do arquivo (ex.: fotos/ab/cd/abcd...)"""
+        return os.path.join(self.pasta, foto_hash[:2], foto_hash[2:4], foto_hash)
+
+    def existe(self, foto_hash):
+        return bool(foto_hash) and os.path.exists(self.caminho(foto_hash))
+
+    def caminho_miniatura(self, foto_hash, tamanho):
+        """Caminho da miniatura (ex.: fotos/ab/cd/abcd....avatar.jpg)"""
+        return f'{self.caminho(foto_hash)}.{tamanho}.jpg'
+
+    def _gravar_arquivo(self, destino, dados):
+        if os.path.exists(destino):
+            return
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        # Gravação atômica: escreve em arquivo temporário e renomeia
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(destino))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(dados)
+            os.replace(tmp, destino)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def gravar(self, dados):
+        """Grava o conteúdo (se ainda não existir) e retorna o hash"""
+        foto_hash = calcular_hash(dados)
+        self._gravar_arquivo(self.caminho(foto_hash), dados)
+        return foto_hash
+
+    def gravar_miniatura(self, foto_hash, tamanho, dados):
+        self._gravar_arquivo(self.caminho_miniatura(foto_hash, tamanho), dados)
+
+    def salvar(self, aluno, dados):
+        aluno.foto_hash = self.gravar(dados)
+        aluno.foto = None
+
+    def ler(self, aluno_id, foto_hash):
+        if not self.existe(foto_hash):
+            return None
+        with open(self.caminho(foto_hash), 'rb') as f:
+            return f.read()
+
+
+class BancoFotoStorage(FotoStorage):
+    """Fotos na coluna BLOB ``alunos.foto`` (modo legado)"""
+
+    def salvar(self, aluno, dados):
+        aluno.foto = dados
+        aluno.foto_hash = calcular_hash(dados)
+
+    def ler(self, aluno_id, foto_hash):
+        # Lê apenas a coluna foto, sem carregar o restante da linha
+        return db.session.query(Aluno.foto).filter(Aluno.id == aluno_id).scalar()
+
+
+STORAGES = {
+    'arquivo': lambda app: ArquivoFotoStorage(app.config['FOTO_FOLDER']),
+    'banco': lambda app: BancoFotoStorage(),
+}
+
+
+def get_storage():
+    """Backend configurado em FOTO_STORAGE (uma instância por app)"""
+    app = current_app._get_current_object()
+    if 'foto_storage' not in app.extensions:
+        nome = app.config.get('FOTO_STORAGE', 'arquivo')
+        if nome not in STORAGES:
+            raise ValueError(f'FOTO_STORAGE inválido: {nome}')
+        app.extensions['foto_storage'] = STORAGES[nome](app)
+    return app.extensions['foto_storage']
+
+
+def get_arquivo_storage():
+    """Storage em disco, usado na leitura e na migração"""
+    storage = get_storage()
+    if isinstance(storage, ArquivoFotoStorage):
+        return storage
+    return ArquivoFotoStorage(current_app.config['FOTO_FOLDER'])
+
+
+def redimensionar(dados, dimensoes):
+    """Gera um JPEG recortado no centro com as dimensões pedidas"""
+    # Import tardio: o Pillow só é usado no upload e nas miniaturas
+    from PIL import Image, ImageOps
+
+    with Image.open(BytesIO(dados)) as imagem:
+        # Image.open só lê o cabeçalho: recusa antes de decodificar os pixels
+        largura, altura = imagem.size
+        if largura * altura > current_app.config['FOTO_MAX_PIXELS']:
+            raise Image.DecompressionBombError(f'Imagem com {largura}x{altura} pixels')
+        imagem = ImageOps.exif_transpose(imagem)
+        if imagem.mode != 'RGB':
+            # Fundo branco para imagens com transparência
+            fundo = Image.new('RGB', imagem.size, 'white')
+            rgba = imagem.convert('RGBA')
+            fundo.paste(rgba, mask=rgba.split()[-1])
+            imagem = fundo
+        miniatura = ImageOps.fit(imagem, dimensoes, Image.LANCZOS)
+
+    saida = BytesIO()
+    miniatura.save(saida, 'JPEG', quality=85, optimize=True)
+    return saida.getvalue()
+
+
+def _miniaturas(dados):
+    """{tamanho: JPEG}, ou None se não for uma imagem aceitável"""
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        return {
+            tamanho: redimensionar(dados, dimensoes)
+            for tamanho, dimensoes in current_app.config['FOTO_MINIATURAS'].items()
+        }
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        return None
+
+
+def _gravar_miniaturas(foto_hash, miniaturas):
+    storage = get_arquivo_storage()
+    try:
+        for tamanho, conteudo in miniaturas.items():
+            storage.gravar_miniatura(foto_hash, tamanho, conteudo)
+    except OSError:
+        return False
+    return True
+
+
+def gerar_miniaturas(dados, foto_hash):
+    """
+    Gera todas as miniaturas configuradas para a foto.
+
+    Retorna False se o conteúdo não for uma imagem aceitável; nesse caso
+    a rota de fotos serve o original.
+    """
+    miniaturas = _miniaturas(dados)
+    return miniaturas is not None and _gravar_miniaturas(foto_hash, miniaturas)
+
+
+def salvar_foto(aluno, dados, filename):
+    """
+    Grava a foto do aluno no backend configurado e as miniaturas.
+
+    As miniaturas são geradas antes: se o conteúdo não for uma imagem
+    aceitável, retorna False sem gravar nada nem alterar o aluno.
+    """
+    miniaturas = _miniaturas(dados)
+    if miniaturas is None:
+        return False
+    get_storage().salvar(aluno, dados)
+    aluno.foto_filename = filename
+    _gravar_miniaturas(aluno.foto_hash, miniaturas)
+    return True
+
+
+def ler_foto(aluno_id, foto_hash=None):
+    """Retorna os bytes da foto do aluno (disco primeiro, depois BLOB)"""
+    conteudo = get_arquivo_storage().ler(aluno_id, foto_hash)
+    if conteudo is None:
+        conteudo = BancoFotoStorage().ler(aluno_id, foto_hash)
+    return conteudo
+
+
+def caminho_miniatura(aluno_id, foto_hash, tamanho):
+    """
+    Caminho da miniatura pronta em disco, ou None.
+
+    Fotos gravadas antes do pipeline de miniaturas são redimensionadas
+    uma única vez, na primeira requisição, e ficam em cache no disco.
+    """
+    if not foto_hash or tamanho not in current_app.config['FOTO_MINIATURAS']:
+        return None
+
+    storage = get_arquivo_storage()
+    caminho = storage.caminho_miniatura(foto_hash, tamanho)
+    if os.path.exists(caminho):
+        return caminho
+
+    conteudo = ler_foto(aluno_id, foto_hash)
+    if conteudo and gerar_miniaturas(conteudo, foto_hash):
+        return caminho
+    return None
+
+
+def migrar_fotos_para_arquivo(lote=100, callback=None):
+    """
+    Move os BLOBs de ``alunos.foto`` para o storage em disco.
+
+    Percorre os alunos em lotes por id crescente (sem OFFSET), grava cada
+    foto pelo hash e limpa a coluna BLOB. Faz commit a cada lote para não
+    segurar transações longas. Retorna o total de fotos migradas.
+    """
+    storage = get_arquivo_storage()
+    ultimo_id = 0
+    total = 0
+
+    while True:
+        linhas = db.session.query(Aluno.id, Aluno.foto).filter(
+            Aluno.id > ultimo_id,
+            Aluno.foto.isnot(None)
+        ).order_by(Aluno.id).limit(lote).all()
+
+        if not linhas:
+            break
+
+        for aluno_id, dados in linhas:
+            foto_hash = storage.gravar(dados)
+            gerar_miniaturas(dados, foto_hash)
+            db.session.execute(
+                db.update(Aluno)
+                .where(Aluno.id == aluno_id)
+                .values(foto=None, foto_hash=foto_hash)
+            )
+
+        db.session.commit()
+        db.session.expunge_all()
+
+        ultimo_id = linhas[-1][0]
+        total += len(linhas)
+        if callback:
+            callback(total)
+
+    return total
@@ -0,0 +1,338 @@
+"""
+Importação em massa de alunos e pets (CSV ou NDJSON).
+
+O arquivo é lido em streaming e gravado em lotes de ``IMPORTACAO_LOTE``
+linhas com um único INSERT (executemany) por lote. A checagem de
+matrículas repetidas também é por lote: uma consulta ``IN (...)`` com as
+matrículas do lote, em vez de uma consulta por linha.
+
+Colunas aceitas:
+
+- alunos: matricula, nome, curso, idade, sexo
+- pets: apelido, raca, data_nascimento (AAAA-MM-DD ou DD/MM/AAAA) e o
+  dono por ``matricula`` (ou ``aluno_id``)
+
+O texto pode estar em UTF-8 (com ou sem BOM) ou em cp1252/Latin-1, o
+padrão do Excel em português. Linhas inválidas são ignoradas e relatadas
+no resultado; cada lote é confirmado separadamente.
+"""
+import csv
+import json
+from datetime import datetime
+from itertools import islice
+
+from sqlalchemy import exc
+
+from app import db
+from app.models.aluno import Aluno
+from app.models.pet import Pet
+from app.services.banco import confirmar
+from app.services.estatisticas import reconstruir_estatisticas
+
+FORMATOS = ('csv', 'ndjson')
+
+# Quantos erros de linha guardar no resultado
+MAX_ERROS = 50
+
+
+class ErroLinha(ValueError):
+    pass
+
+
+def detectar_formato(nome_arquivo):
+    """'ndjson' para .ndjson/.jsonl, senão 'csv'"""
+    return 'ndjson' if (nome_arquivo or '').lower().endswith(('.ndjson', '.jsonl')) else 'csv'
+
+
+def ler_registros(texto, formato='csv'):
+    """
+    Gera (número da linha, dicionário) de um arquivo texto CSV ou NDJSON.
+
+    Linhas ilegíveis geram (número, ErroLinha) em vez do dicionário.
+    """
+    texto = iter(texto)
+    if formato == 'ndjson':
+        for numero, linha in enumerate(texto, start=1):
+            if linha.strip():
+                try:
+                    yield numero, json.loads(linha)
+                except ValueError:
+                    yield numero, ErroLinha('linha não é um objeto JSON')
+        return
+
+    # Separador ',' ou ';' (planilhas em português costumam usar ';')
+    amostra = next(texto, '')
+    dialeto = csv.excel
+    try:
+        dialeto = csv.Sniffer().sniff(amostra, delimiters=',;')
+    except csv.Error:
+        pass
+    try:
+        cabecalho = [c.strip().lower() for c in next(csv.reader([amostra], dialeto), [])]
+    except csv.Error as e:
+        yield 1, ErroLinha(f'cabeçalho ilegível: {e}')
+        return
+
+    leitor = csv.reader(texto, dialeto)
+    while True:
+        try:
+            valores = next(leitor)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield leitor.line_num + 1, ErroLinha(f'linha ilegível: {e}')
+            continue
+        if any(v.strip() for v in valores):
+            yield leitor.line_num + 1, dict(zip(cabecalho, valores))
+
+
+def _decodificar(linha):
+    try:
+        return linha.decode('utf-8')
+    except UnicodeDecodeError:
+        return linha.decode('cp1252', errors='replace')
+
+
+def abrir_texto(binario):
+    """
+    Linhas de texto de um arquivo binário, em UTF-8 (BOM opcional) ou
+    cp1252; a codificação é decidida linha a linha, sem ler o arquivo todo.
+    """
+    for numero, linha in enumerate(binario):
+        if numero == 0 and linha.startswith(b'\xef\xbb\xbf'):
+            linha = linha[3:]
+        yield _decodificar(linha)
+
+
+def _texto(registro, campo, maximo=None):
+    valor = registro.get(campo)
+    valor = str(valor).strip() if valor is not None else ''
+    if maximo and len(valor) > maximo:
+        raise ErroLinha(f'{campo} com mais de {maximo} caracteres')
+    return valor or None
+
+
+def _aluno(registro):
+    matricula = _texto(registro, 'matricula', 20)
+    nome = _texto(registro, 'nome', 200)
+    if not matricula or not nome:
+        raise ErroLinha('matrícula e nome são obrigatórios')
+
+    idade = _texto(registro, 'idade')
+    try:
+        idade = int(idade) if idade else None
+    except ValueError:
+        raise ErroLinha(f'idade inválida: {idade}')
+
+    sexo = (_texto(registro, 'sexo') or '').upper()[:1] or None
+    if sexo not in (None, 'M', 'F'):
+        raise ErroLinha(f'sexo inválido: {sexo}')
+
+    return {
+        'matricula': matricula,
+        'nome': nome,
+        'curso': _texto(registro, 'curso', 100),
+        'idade': idade,
+        'sexo': sexo,
+    }
+
+
+def _data(valor):
+    for formato in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(valor, formato).date()
+        except ValueError:
+            pass
+    raise ErroLinha(f'data de nascimento inválida: {valor}')
+
+
+def _pet(registro):
+    apelido = _texto(registro, 'apelido', 100)
+    if not apelido:
+        raise ErroLinha('apelido é obrigatório')
+
+    dono = _texto(registro, 'matricula') or _texto(registro, 'aluno_id')
+    if not dono:
+        raise ErroLinha('informe a matrícula (ou aluno_id) do dono')
+
+    data_nascimento = _texto(registro, 'data_nascimento')
+    return {
+        'apelido': apelido,
+        'raca': _texto(registro, 'raca', 100),
+        'data_nascimento': _data(data_nascimento) if data_nascimento else None,
+        # Resolvidos por lote em _resolver_donos
+        'matricula': _texto(registro, 'matricula'),
+        'aluno_id': _texto(registro, 'aluno_id'),
+    }
+
+
+class Resultado:
+    """Totais da importação (e as primeiras linhas com erro)"""
+
+    def __init__(self):
+        self.lidos = 0
+        self.inseridos = 0
+        self.duplicados = 0
+        self.invalidos = 0
+        self.erros = []
+
+    def erro(self, numero, mensagem):
+        self.invalidos += 1
+        if len(self.erros) < MAX_ERROS:
+            self.erros.append(f'Linha {numero}: {mensagem}')
+
+    def to_dict(self):
+        return {
+            'lidos': self.lidos,
+            'inseridos': self.inseridos,
+            'duplicados': self.duplicados,
+            'invalidos': self.invalidos,
+            'erros': self.erros,
+        }
+
+
+def _lotes(registros, tamanho):
+    registros = iter(registros)
+    while True:
+        lote = list(islice(registros, tamanho))
+        if not lote:
+            return
+        yield lote
+
+
+def _validar(lote, converter, resultado):
+    validos = []
+    for numero, registro in lote:
+        resultado.lidos += 1
+        if isinstance(registro, ErroLinha):
+            resultado.erro(numero, str(registro))
+            continue
+        if not isinstance(registro, dict):
+            resultado.erro(numero, 'linha não é um objeto JSON')
+            continue
+        try:
+            validos.append((numero, converter(registro)))
+        except ErroLinha as e:
+            resultado.erro(numero, str(e))
+    return validos
+
+
+def _inserir(modelo, linhas, resultado, conflito):
+    """
+    Um INSERT (executemany) por lote. Se outro processo gravou ou excluiu
+    no meio (matrícula repetida, dono excluído), o lote volta atrás e é
+    refeito linha a linha; as linhas recusadas viram erros com ``conflito``.
+    """
+    try:
+        if linhas:
+            db.session.execute(db.insert(modelo), [linha for _, linha in linhas])
+        if confirmar():
+            resultado.inseridos += len(linhas)
+            return
+    except exc.IntegrityError:
+        db.session.rollback()
+
+    for numero, linha in linhas:
+        try:
+            db.session.execute(db.insert(modelo), [linha])
+            ok = confirmar()
+        except exc.IntegrityError:
+            db.session.rollback()
+            ok = False
+        if ok:
+            resultado.inseridos += 1
+        else:
+            resultado.erro(numero, conflito)
+
+
+def importar_alunos(registros, lote=1000, callback=None):
+    """
+    Insere os alunos em lotes, ignorando matrículas já cadastradas ou
+    repetidas no próprio arquivo. ``callback(resultado)`` a cada lote.
+    """
+    resultado = Resultado()
+
+    for pedaco in _lotes(registros, lote):
+        linhas = {}
+        for numero, aluno in _validar(pedaco, _aluno, resultado):
+            if aluno['matricula'] in linhas:
+                resultado.duplicados += 1
+            else:
+                linhas[aluno['matricula']] = (numero, aluno)
+
+        novas = []
+        if linhas:
+            existentes = set(db.session.scalars(
+                db.select(Aluno.matricula).where(Aluno.matricula.in_(list(linhas)))
+            ))
+            novas = [l for m, l in linhas.items() if m not in existentes]
+            resultado.duplicados += len(existentes)
+        _inserir(Aluno, novas, resultado, 'matrícula cadastrada durante a importação')
+
+        if callback:
+            callback(resultado)
+
+    # INSERT em massa não dispara os eventos que mantêm a tabela de estatísticas
+    if resultado.inseridos:
+        reconstruir_estatisticas()
+    return resultado
+
+
+def _resolver_donos(validos, resultado):
+    """Troca matrícula/aluno_id pelo id do aluno (uma consulta por tipo de chave)"""
+    matriculas = {p['matricula'] for _, p in validos if p['matricula']}
+    ids = {p['aluno_id'] for _, p in validos if not p['matricula'] and p['aluno_id']}
+
+    por_matricula = dict(db.session.execute(
+        db.select(Aluno.matricula, Aluno.id).where(Aluno.matricula.in_(list(matriculas)))
+    ).all()) if matriculas else {}
+
+    ids_validos = set()
+    numericos = [int(i) for i in ids if i.isdigit()]
+    if numericos:
+        ids_validos = {str(i) for i in db.session.scalars(db.select(Aluno.id).where(Aluno.id.in_(numericos)))}
+
+    linhas = []
+    for numero, pet in validos:
+        matricula, aluno_id = pet.pop('matricula'), pet.pop('aluno_id')
+        if matricula:
+            pet['aluno_id'] = por_matricula.get(matricula)
+        else:
+            pet['aluno_id'] = int(aluno_id) if aluno_id in ids_validos else None
+
+        if pet['aluno_id'] is None:
+            resultado.erro(numero, f'aluno não encontrado: {matricula or aluno_id}')
+        else:
+            linhas.append((numero, pet))
+    return linhas
+
+
+def importar_pets(registros, lote=1000, callback=None):
+    """Insere os pets em lotes; o dono é buscado pela matrícula (ou aluno_id)"""
+    resultado = Resultado()
+
+    for pedaco in _lotes(registros, lote):
+        linhas = _resolver_donos(_validar(pedaco, _pet, resultado), resultado)
+        _inserir(Pet, linhas, resultado, 'aluno excluído durante a importação')
+
+        if callback:
+            callback(resultado)
+
+    if resultado.inseridos:
+        reconstruir_estatisticas()
+    return resultado
+
+
+IMPORTADORES = {
+    'alunos': importar_alunos,
+    'pets': importar_pets,
+}
+
+
+def importar_arquivo(tipo, binario, nome_arquivo=None, formato=None, lote=1000, callback=None):
+    """Importa um arquivo binário (upload ou arquivo aberto em 'rb')"""
+    formato = formato or detectar_formato(nome_arquivo)
+    if formato not in FORMATOS:
+        raise ValueError(f'Formato inválido: {formato}')
+
+    return IMPORTADORES[tipo](ler_registros(abrir_texto(binario), formato), lote=lote, callback=callback)
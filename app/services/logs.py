@@ -0,0 +1,135 @@
+"""
+Logs da aplicação em JSON, sem bloquear as requisições.
+
+Os registros de ``app.logger`` vão para uma fila (``QueueHandler``) e uma
+thread (``QueueListener``) grava no arquivo ``LOG_FILE``, com rotação por
+tamanho. Cada linha é um objeto JSON; registros feitos durante uma
+requisição levam o ``request_id`` (cabeçalho ``X-Request-ID`` recebido ou
+gerado), devolvido também na resposta.
+
+Ao fim de cada requisição é registrada uma linha com método, caminho,
+status, duração e tamanho da resposta (e as medições de
+``services.metricas``, quando ativas).
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from flask import g, has_request_context, request
+from flask.logging import default_handler
+
+# Atributos padrão de LogRecord (o resto veio de extra=...)
+_ATRIBUTOS_PADRAO = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'request_id'}
+
+
+class FormatoJSON(logging.Formatter):
+    """Uma linha JSON por registro, com os campos passados em extra="""
+
+    def format(self, record):
+        dados = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensagem': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+        }
+        for chave, valor in vars(record).items():
+            if chave not in _ATRIBUTOS_PADRAO:
+                dados[chave] = valor
+        if record.exc_info:
+            dados['excecao'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            dados['excecao'] = record.exc_text
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class FiltroRequisicao(logging.Filter):
+    """Copia o request_id para o registro (na thread da requisição)"""
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = g.get('request_id') if has_request_context() else None
+        return True
+
+
+class FilaHandler(QueueHandler):
+    """Enfileira o registro sem formatar: o JSON é montado na thread do listener"""
+
+    def prepare(self, record):
+        if record.exc_info:
+            # Traceback vira texto aqui: o objeto não deve atravessar a fila
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def parar_logs(app):
+    """Grava o que estiver na fila e encerra a thread do listener"""
+    listener = app.extensions.pop('logs', None)
+    if listener is not None:
+        listener.stop()
+
+
+def configurar_logs(app):
+    """Liga app.logger ao arquivo LOG_FILE via fila e registra as requisições"""
+    os.makedirs(os.path.dirname(app.config['LOG_FILE']), exist_ok=True)
+
+    arquivo = RotatingFileHandler(
+        app.config['LOG_FILE'],
+        maxBytes=app.config['LOG_MAX_BYTES'],
+        backupCount=app.config['LOG_BACKUP_COUNT'],
+        encoding='utf-8',
+        delay=True
+    )
+    arquivo.setFormatter(FormatoJSON())
+
+    fila = queue.Queue(-1)
+    handler = FilaHandler(fila)
+    handler.addFilter(FiltroRequisicao())
+    listener = QueueListener(fila, arquivo, respect_handler_level=True)
+    listener.start()
+    atexit.register(parar_logs, app)
+
+    # create_app pode ser chamada mais de uma vez no mesmo processo
+    for antigo in [h for h in app.logger.handlers if isinstance(h, FilaHandler)]:
+        app.logger.removeHandler(antigo)
+    if not app.debug:
+        # Fora do debug, nada de escrita síncrona no stderr
+        app.logger.removeHandler(default_handler)
+
+    app.logger.addHandler(handler)
+    app.logger.setLevel(app.config['LOG_LEVEL'])
+    app.extensions['logs'] = listener
+
+    @app.before_request
+    def _iniciar_requisicao():
+        g.request_id = request.headers.get('X-Request-ID', '')[:64] or uuid.uuid4().hex
+        g.inicio_requisicao = time.perf_counter()
+
+    @app.after_request
+    def _registrar_requisicao(response):
+        response.headers['X-Request-ID'] = g.get('request_id', '')
+        if request.endpoint != 'static' and 'inicio_requisicao' in g:
+            campos = {
+                'metodo': request.method,
+                'caminho': request.path,
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'duracao_ms': round((time.perf_counter() - g.inicio_requisicao) * 1000, 2),
+                'bytes': response.content_length,
+            }
+            # Medições de services.metricas, se ativas
+            metricas = g.get('metricas')
+            if metricas:
+                campos.update(consultas=metricas['consultas'], sql_ms=metricas['sql_ms'],
+                              template_ms=metricas['template_ms'])
+            app.logger.info('requisicao', extra=campos)
+        return response
@@ -0,0 +1,143 @@
+"""
+Métricas de desempenho por requisição (opcional: ``METRICAS_ATIVAS``).
+
+Para cada requisição são medidos o número de comandos SQL e o tempo no
+banco (eventos ``before/after_cursor_execute``, como em
+``ContadorConsultas``), o tempo de renderização dos templates (sinais
+``before_render_template``/``template_rendered``), o tempo total e o
+tamanho da resposta.
+
+Os valores vão no cabeçalho ``Server-Timing`` (visível no DevTools do
+navegador), na linha de log da requisição e num histórico por endpoint
+(últimas ``METRICAS_AMOSTRAS`` requisições), resumido em percentis por
+``resumo()`` e exposto em ``/metricas``.
+"""
+import threading
+import time
+from collections import deque
+
+from flask import before_render_template, current_app, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+CAMPOS = ('total_ms', 'sql_ms', 'consultas', 'template_ms', 'bytes')
+PERCENTIS = (50, 90, 99)
+
+
+class HistoricoMetricas:
+    """Últimas amostras de cada endpoint, seguro para uso entre threads"""
+
+    def __init__(self, amostras):
+        self.amostras = amostras
+        self._dados = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, endpoint, valores):
+        with self._lock:
+            if endpoint not in self._dados:
+                self._dados[endpoint] = deque(maxlen=self.amostras)
+            self._dados[endpoint].append(valores)
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+
+    def resumo(self):
+        """Percentis (p50, p90, p99) e máximo de cada campo, por endpoint"""
+        with self._lock:
+            copia = {endpoint: list(valores) for endpoint, valores in self._dados.items()}
+
+        resultado = {}
+        for endpoint, valores in sorted(copia.items()):
+            campos = {}
+            for campo in CAMPOS:
+                numeros = sorted(v[campo] for v in valores if v[campo] is not None)
+                if numeros:
+                    campos[campo] = {f'p{p}': percentil(numeros, p) for p in PERCENTIS}
+                    campos[campo]['max'] = numeros[-1]
+            resultado[endpoint] = {'requisicoes': len(valores), **campos}
+        return resultado
+
+
+def percentil(ordenados, p):
+    """Percentil pelo método nearest-rank (lista já ordenada)"""
+    indice = max(0, -(-p * len(ordenados) // 100) - 1)
+    return ordenados[indice]
+
+
+def _medindo():
+    return has_request_context() and 'metricas' in g
+
+
+# Banco: vale para todos os engines (inclusive binds adicionais)
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _antes_sql(conn, cursor, statement, parameters, context, executemany):
+    if _medindo():
+        conn.info.setdefault('metricas_inicio', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _depois_sql(conn, cursor, statement, parameters, context, executemany):
+    inicio = conn.info.get('metricas_inicio')
+    if inicio and _medindo():
+        g.metricas['consultas'] += 1
+        g.metricas['sql_ms'] += (time.perf_counter() - inicio.pop()) * 1000
+
+
+def _antes_template(app, template, context):
+    if _medindo():
+        g.metricas_templates.append(time.perf_counter())
+
+
+def _depois_template(app, template, context):
+    if _medindo() and g.metricas_templates:
+        g.metricas['template_ms'] += (time.perf_counter() - g.metricas_templates.pop()) * 1000
+
+
+def _server_timing(metricas):
+    return ', '.join([
+        f'sql;dur={metricas["sql_ms"]:.1f};desc="{metricas["consultas"]} consultas"',
+        f'tpl;dur={metricas["template_ms"]:.1f}',
+        f'total;dur={metricas["total_ms"]:.1f}',
+    ])
+
+
+def configurar_metricas(app):
+    """Liga as medições e o cabeçalho Server-Timing (se METRICAS_ATIVAS)"""
+    if not app.config['METRICAS_ATIVAS']:
+        return
+
+    historico = HistoricoMetricas(app.config['METRICAS_AMOSTRAS'])
+    app.extensions['metricas'] = historico
+
+    before_render_template.connect(_antes_template, app)
+    template_rendered.connect(_depois_template, app)
+
+    @app.before_request
+    def _iniciar_metricas():
+        g.metricas = {'consultas': 0, 'sql_ms': 0.0, 'template_ms': 0.0}
+        g.metricas_templates = []
+        g.metricas_inicio = time.perf_counter()
+
+    @app.after_request
+    def _registrar_metricas(response):
+        if 'metricas' not in g:
+            return response
+
+        metricas = g.metricas
+        metricas['total_ms'] = (time.perf_counter() - g.metricas_inicio) * 1000
+        metricas['bytes'] = response.content_length
+        response.headers['Server-Timing'] = _server_timing(metricas)
+
+        for campo in ('sql_ms', 'template_ms', 'total_ms'):
+            metricas[campo] = round(metricas[campo], 2)
+        if request.endpoint and request.endpoint != 'static':
+            historico.registrar(request.endpoint, dict(metricas))
+        return response
+
+
+def resumo():
+    """Resumo por endpoint da aplicação atual ({} se as métricas estão desligadas)"""
+    historico = current_app.extensions.get('metricas')
+    return historico.resumo() if historico else {}
@@ -0,0 +1,118 @@
+"""
+Paginação das listagens.
+
+``paginar`` usa OFFSET (com números de página) e ``paginar_por_cursor``
+usa keyset: o cursor guarda a chave de ordenação (ex.: nome, id) da
+borda da página e a consulta seguinte filtra ``(nome, id) > cursor``,
+sem OFFSET. Nos dois modos o total vem de um COUNT em cache
+(``PAGINACAO_TOTAL_TTL``), em vez de ser recalculado a cada página.
+"""
+import base64
+import json
+
+from flask import current_app
+
+from app import db
+from app.services.cache import memoizar
+
+
+def total_em_cache(query, chave):
+    """COUNT da consulta filtrada, guardado por PAGINACAO_TOTAL_TTL segundos"""
+    return memoizar(
+        f'total:{chave}',
+        lambda: query.order_by(None).count(),
+        ttl=current_app.config['PAGINACAO_TOTAL_TTL']
+    )
+
+
+def paginar(query, page, per_page, chave_total):
+    """paginate() do Flask-SQLAlchemy, com o total vindo do cache"""
+    pagination = query.paginate(page=page, per_page=per_page, error_out=False, count=False)
+    pagination.total = total_em_cache(query, chave_total)
+    return pagination
+
+
+def codificar_cursor(direcao, valores):
+    dados = json.dumps({'d': direcao, 'k': list(valores)}, default=str)
+    return base64.urlsafe_b64encode(dados.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Retorna (direcao, valores) ou None se o cursor for inválido"""
+    if not cursor:
+        return None
+    try:
+        dados = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if dados['d'] not in ('n', 'p') or not isinstance(dados['k'], list) or len(dados['k']) != 2:
+            return None
+        # Só valores simples chegam aos parâmetros da consulta
+        if not all(v is None or type(v) in (str, int, float) for v in dados['k']):
+            return None
+        return dados['d'], dados['k']
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+class PaginaCursor:
+    """Página de resultados por cursor (mesmos nomes usados pelos templates)"""
+
+    modo = 'cursor'
+
+    def __init__(self, items, per_page, total, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.per_page = per_page
+        self.total = total
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def paginar_por_cursor(query, coluna, chave, cursor, per_page, chave_total):
+    """
+    Página seguinte/anterior ao cursor, ordenada por (coluna, chave).
+
+    ``coluna`` não pode ser nula e ``chave`` é única (normalmente o id).
+    A ordenação existente da consulta é descartada.
+    """
+    total = total_em_cache(query, chave_total)
+    query = query.order_by(None)
+    posicao = decodificar_cursor(cursor)
+
+    if posicao is None:
+        direcao = 'n'
+        linhas = query.order_by(coluna, chave).limit(per_page + 1).all()
+    else:
+        direcao, (valor, id_) = posicao
+        if direcao == 'n':
+            filtro = db.or_(coluna > valor, db.and_(coluna == valor, chave > id_))
+            linhas = query.filter(filtro).order_by(coluna, chave).limit(per_page + 1).all()
+        else:
+            filtro = db.or_(coluna < valor, db.and_(coluna == valor, chave < id_))
+            linhas = query.filter(filtro).order_by(coluna.desc(), chave.desc()).limit(per_page + 1).all()
+
+    ha_mais = len(linhas) > per_page
+    items = linhas[:per_page]
+    if direcao == 'p':
+        items.reverse()
+
+    def borda(item):
+        return (getattr(item, coluna.key), getattr(item, chave.key))
+
+    # Vindo de "próximo" sempre há anterior, e vice-versa
+    tem_proxima = ha_mais if direcao == 'n' else True
+    tem_anterior = posicao is not None if direcao == 'n' else ha_mais
+
+    return PaginaCursor(
+        items,
+        per_page,
+        total,
+        next_cursor=codificar_cursor('n', borda(items[-1])) if items and tem_proxima else None,
+        prev_cursor=codificar_cursor('p', borda(items[0])) if items and tem_anterior else None,
+    )
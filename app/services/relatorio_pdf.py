@@ -0,0 +1,100 @@
+"""
+Relatório PDF de alunos.
+
+As linhas são lidas em lotes, só com as colunas impressas, e o PDF é
+gravado direto em arquivo na pasta ``RELATORIOS_FOLDER``. O nome do
+arquivo leva a versão dos dados (total, maior id, último updated_at):
+enquanto os alunos não mudarem, downloads repetidos usam o mesmo arquivo.
+"""
+import os
+from datetime import datetime
+from functools import lru_cache
+
+from flask import current_app
+
+from app.models.aluno import Aluno
+from app.services.cache_http import gerar_etag, versao_tabela
+from app.services.exportacao import iterar_em_lotes
+from app.services.relatorios import gerar_arquivo
+from app.services.tarefas import registrar_tipo
+
+
+@lru_cache(maxsize=None)
+def _classe_pdf():
+    """
+    Classe do relatório; o fpdf só é importado na primeira geração (é o
+    import mais pesado da aplicação e só o worker de relatórios precisa dele).
+    """
+    from fpdf import FPDF
+
+    class RelatorioAlunosPDF(FPDF):
+        def header(self):
+            self.set_font('Arial', 'B', 16)
+            self.cell(0, 10, 'Relatório de Alunos', 0, 1, 'C')
+            self.set_font('Arial', 'I', 10)
+            self.cell(0, 5, f'Gerado em: {datetime.now().strftime("%d/%m/%Y %H:%M")}', 0, 1, 'C')
+            self.ln(5)
+
+        def footer(self):
+            self.set_y(-15)
+            self.set_font('Arial', 'I', 8)
+            self.cell(0, 10, f'Página {self.page_no()}', 0, 0, 'C')
+
+    return RelatorioAlunosPDF
+
+
+def versao_alunos():
+    """Carimbo da versão atual dos dados de alunos"""
+    return gerar_etag('alunos-pdf', *versao_tabela(Aluno))[:16]
+
+
+def caminho_pdf(versao):
+    return os.path.join(current_app.config['RELATORIOS_FOLDER'], f'alunos_{versao}.pdf')
+
+
+def escrever_pdf(destino):
+    """Gera o PDF de alunos no arquivo destino"""
+    pdf = _classe_pdf()()
+    pdf.add_page()
+    pdf.set_font('Arial', 'B', 12)
+
+    # Cabeçalho da tabela
+    pdf.cell(30, 10, 'Matrícula', 1)
+    pdf.cell(70, 10, 'Nome', 1)
+    pdf.cell(50, 10, 'Curso', 1)
+    pdf.cell(20, 10, 'Idade', 1)
+    pdf.cell(20, 10, 'Sexo', 1)
+    pdf.ln()
+
+    # Dados (ordenados por nome; lotes por (nome, id))
+    pdf.set_font('Arial', '', 10)
+    colunas = [Aluno.id, Aluno.nome, Aluno.matricula, Aluno.curso, Aluno.idade, Aluno.sexo]
+    total = 0
+
+    for aluno in iterar_em_lotes(colunas, Aluno.nome, desempate=Aluno.id,
+                                 lote=current_app.config['EXPORTACAO_LOTE']):
+        pdf.cell(30, 8, aluno.matricula or '', 1)
+        pdf.cell(70, 8, aluno.nome[:30] if aluno.nome else '', 1)
+        pdf.cell(50, 8, aluno.curso[:20] if aluno.curso else '', 1)
+        pdf.cell(20, 8, str(aluno.idade) if aluno.idade else '', 1, 0, 'C')
+        pdf.cell(20, 8, aluno.sexo or '', 1, 0, 'C')
+        pdf.ln()
+        total += 1
+
+    # Total
+    pdf.ln(5)
+    pdf.set_font('Arial', 'B', 10)
+    pdf.cell(0, 10, f'Total de alunos: {total}', 0, 1)
+
+    pdf.output(destino)
+
+
+def gerar_pdf_alunos(versao=None):
+    """Caminho do PDF para a versão atual dos dados, gerando se necessário"""
+    return gerar_arquivo('alunos', 'pdf', versao or versao_alunos(), escrever_pdf)
+
+
+registrar_tipo(
+    'alunos_pdf', gerar_pdf_alunos, versao_alunos,
+    mimetype='application/pdf', download_name='relatorio_alunos_{data}.pdf'
+)
@@ -0,0 +1,108 @@
+"""
+Arquivos de relatório versionados e o relatório mestre-detalhe completo.
+
+Cada relatório é gravado em ``RELATORIOS_FOLDER`` com a versão dos dados
+no nome (``<prefixo>_<versao>.<extensao>``): enquanto os dados não mudam,
+pedidos repetidos reaproveitam o mesmo arquivo.
+"""
+import glob
+import os
+import tempfile
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy.orm import load_only, selectinload
+
+from app import db
+from app.models.aluno import Aluno
+from app.models.pet import Pet
+from app.services.cache_http import gerar_etag, versao_tabela
+from app.services.tarefas import registrar_tipo
+
+
+def gerar_arquivo(prefixo, extensao, versao, escrever):
+    """
+    Caminho do relatório para a versão, chamando ``escrever(caminho)`` se
+    ainda não existir.
+
+    A gravação é atômica (arquivo temporário + rename) e versões antigas
+    são removidas depois que a nova fica pronta.
+    """
+    pasta = current_app.config['RELATORIOS_FOLDER']
+    destino = os.path.join(pasta, f'{prefixo}_{versao}.{extensao}')
+    if os.path.exists(destino):
+        return destino
+
+    os.makedirs(pasta, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=pasta, suffix='.tmp')
+    os.close(fd)
+    try:
+        escrever(tmp)
+        os.replace(tmp, destino)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    for antigo in glob.glob(os.path.join(pasta, f'{prefixo}_*.{extensao}')):
+        if antigo != destino:
+            try:
+                os.remove(antigo)
+            except OSError:
+                pass
+
+    return destino
+
+
+def consulta_mestre_detalhe():
+    """Alunos com os pets, só com as colunas exibidas no relatório"""
+    return Aluno.query.options(
+        load_only(Aluno.id, Aluno.matricula, Aluno.nome, Aluno.curso, Aluno.idade, Aluno.sexo),
+        selectinload(Aluno.pets).load_only(Pet.apelido, Pet.raca, Pet.data_nascimento)
+    )
+
+
+def versao_mestre_detalhe():
+    return gerar_etag('mestre-detalhe', *versao_tabela(Aluno), *versao_tabela(Pet))[:16]
+
+
+def _alunos_em_lotes(lote):
+    """Todos os alunos (com pets) em lotes por (nome, id), sem OFFSET"""
+    ultimo = None
+    while True:
+        query = consulta_mestre_detalhe()
+        if ultimo is not None:
+            query = query.filter(db.or_(
+                Aluno.nome > ultimo[0],
+                db.and_(Aluno.nome == ultimo[0], Aluno.id > ultimo[1])
+            ))
+        alunos = query.order_by(Aluno.nome, Aluno.id).limit(lote).all()
+        if not alunos:
+            break
+
+        yield from alunos
+
+        ultimo = (alunos[-1].nome, alunos[-1].id)
+        # Libera os objetos do lote anterior
+        db.session.expunge_all()
+        if len(alunos) < lote:
+            break
+
+
+def escrever_mestre_detalhe(destino):
+    """Gera o HTML com todos os alunos e pets no arquivo destino"""
+    template = current_app.jinja_env.get_template('relatorios/mestre_detalhe_completo.html')
+    alunos = _alunos_em_lotes(current_app.config['EXPORTACAO_LOTE'])
+    with open(destino, 'w', encoding='utf-8') as f:
+        for trecho in template.generate(alunos=alunos, gerado_em=datetime.now()):
+            f.write(trecho)
+
+
+def gerar_mestre_detalhe(versao=None):
+    versao = versao or versao_mestre_detalhe()
+    return gerar_arquivo('mestre_detalhe', 'html', versao, escrever_mestre_detalhe)
+
+
+registrar_tipo(
+    'mestre_detalhe', gerar_mestre_detalhe, versao_mestre_detalhe,
+    mimetype='text/html', download_name='mestre_detalhe_{data}.html'
+)
@@ -0,0 +1,109 @@
+"""
+Leituras na réplica, escritas no primário (opcional: ``REPLICA_URI``).
+
+Com uma réplica configurada, ela vira o bind ``replica`` e a sessão do
+Flask-SQLAlchemy (``SessaoRoteada``) escolhe o engine de cada comando:
+
+- requisições GET/HEAD leem da réplica;
+- flush, INSERT/UPDATE/DELETE, SQL textual e qualquer outro método HTTP
+  vão para o primário;
+- depois de uma escrita, o resto da requisição e as requisições seguintes
+  do mesmo navegador, por ``REPLICA_FIXAR_SEGUNDOS``, leem do primário
+  (o usuário vê o que acabou de gravar mesmo com atraso na replicação);
+- valores calculados para o cache (``ler_do_primario``, usado por
+  ``memoizar``) também: a réplica atrasada não pode repor no cache, por
+  todo o TTL, dados que uma escrita acabou de invalidar.
+
+Fora de requisições (comandos flask, worker de relatórios) tudo vai para
+o primário.
+
+Para testar localmente, use dois arquivos SQLite (``DB_REPLICA_URI``) e
+``flask sincronizar-replica`` para copiar o primário para a réplica.
+"""
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import sqlalchemy as sa
+from flask import current_app, g, has_request_context, request, session as sessao_http
+from flask_sqlalchemy.session import Session
+
+METODOS_LEITURA = ('GET', 'HEAD')
+
+
+def _ler_da_replica():
+    if not has_request_context() or request.method not in METODOS_LEITURA:
+        return False
+    if g.get('banco_primario') or g.get('ler_do_primario'):
+        return False
+    return sessao_http.get('primario_ate', 0) < time.time()
+
+
+def _leitura(clause):
+    """SELECT sem FOR UPDATE (SQL textual pode escrever: fica no primário)"""
+    return (isinstance(clause, (sa.Select, sa.CompoundSelect))
+            and getattr(clause, '_for_update_arg', None) is None)
+
+
+@contextmanager
+def ler_do_primario():
+    """Leituras dentro do bloco vão para o primário (sem fixar o navegador nele)"""
+    if not has_request_context():
+        yield
+        return
+    anterior = g.get('ler_do_primario', False)
+    g.ler_do_primario = True
+    try:
+        yield
+    finally:
+        g.ler_do_primario = anterior
+
+
+class SessaoRoteada(Session):
+    """Sessão que manda SELECTs de requisições de leitura para a réplica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            escrita = self._flushing or isinstance(clause, sa.UpdateBase)
+            if escrita and has_request_context():
+                g.banco_primario = True
+            elif _leitura(clause):
+                replica = self._db.engines.get('replica') if _ler_da_replica() else None
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def configurar_replica(app):
+    """Registra a réplica como bind (após configurar_pool, antes de db.init_app)"""
+    uri = app.config.get('REPLICA_URI')
+    if not uri:
+        return
+
+    # Binds não herdam SQLALCHEMY_ENGINE_OPTIONS: mesmo pool do primário
+    opcoes = {**(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}), 'url': uri}
+    app.config['SQLALCHEMY_BINDS'] = {**(app.config.get('SQLALCHEMY_BINDS') or {}), 'replica': opcoes}
+
+    @app.after_request
+    def _fixar_no_primario(response):
+        if g.get('banco_primario'):
+            sessao_http['primario_ate'] = time.time() + current_app.config['REPLICA_FIXAR_SEGUNDOS']
+        return response
+
+
+def sincronizar_sqlite(db):
+    """Copia o banco primário para a réplica (só SQLite, para desenvolvimento)"""
+    replica = db.engines.get('replica')
+    if replica is None:
+        raise ValueError('REPLICA_URI não configurada')
+    if db.engine.dialect.name != 'sqlite' or replica.dialect.name != 'sqlite':
+        raise ValueError('Só é possível copiar entre bancos SQLite; use a replicação do MySQL')
+
+    replica.dispose()
+    origem = sqlite3.connect(db.engine.url.database)
+    destino = sqlite3.connect(replica.url.database)
+    try:
+        origem.backup(destino)
+    finally:
+        destino.close()
+        origem.close()
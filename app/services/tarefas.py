@@ -0,0 +1,295 @@
+"""
+Fila de tarefas dos relatórios pesados.
+
+Cada tarefa é um arquivo JSON em ``TAREFAS_FOLDER``, numa subpasta por
+estado (pendentes, executando, concluidas, erros). A troca de estado é
+um ``os.replace``, atômico no mesmo sistema de arquivos, então vários
+processos (web e ``flask worker-relatorios``) podem dividir a fila sem
+executar a mesma tarefa duas vezes. Enquanto a tarefa roda, o mtime do
+arquivo em execução é renovado (``renovar``); só tarefas sem esse sinal
+por ``TAREFAS_TIMEOUT`` segundos (worker que morreu) voltam à fila.
+
+O id da tarefa é o tipo mais a versão dos dados: pedidos iguais feitos
+enquanto os dados não mudam viram uma única tarefa.
+
+Com ``TAREFAS_MODO='local'`` o próprio processo web executa a fila num
+pool de threads; com ``'worker'`` ela só é processada pelo comando
+``flask worker-relatorios``.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, suppress
+from datetime import datetime
+
+from flask import current_app
+
+PENDENTE = 'pendente'
+EXECUTANDO = 'executando'
+CONCLUIDA = 'concluida'
+ERRO = 'erro'
+
+PASTAS = {
+    PENDENTE: 'pendentes',
+    EXECUTANDO: 'executando',
+    CONCLUIDA: 'concluidas',
+    ERRO: 'erros',
+}
+
+# Tipos de tarefa: registrados pelos serviços de relatório (ver registrar_tipo)
+TIPOS = {}
+
+
+def registrar_tipo(tipo, funcao, versao, mimetype=None, download_name=None, endpoint=None):
+    """
+    Registra um tipo de tarefa.
+
+    ``funcao(versao)`` gera o relatório e retorna o caminho do arquivo
+    (ou None); ``versao()`` retorna a versão atual dos dados usados.
+    ``download_name`` aceita ``{data}``; ``endpoint`` é a página que
+    mostra o resultado quando a tarefa não gera arquivo.
+    """
+    TIPOS[tipo] = {
+        'funcao': funcao,
+        'versao': versao,
+        'mimetype': mimetype,
+        'download_name': download_name,
+        'endpoint': endpoint,
+    }
+
+
+class FilaArquivos:
+    """Fila de tarefas persistida em arquivos JSON"""
+
+    def __init__(self, pasta, timeout):
+        self.pasta = pasta
+        self.timeout = timeout
+        for subpasta in PASTAS.values():
+            os.makedirs(os.path.join(pasta, subpasta), exist_ok=True)
+
+    def _caminho(self, status, tarefa_id):
+        return os.path.join(self.pasta, PASTAS[status], f'{tarefa_id}.json')
+
+    def _ler(self, caminho):
+        try:
+            with open(caminho, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _gravar(self, status, tarefa):
+        tarefa['status'] = status
+        tarefa['atualizado_em'] = datetime.utcnow().isoformat()
+        destino = self._caminho(status, tarefa['id'])
+        tmp = f'{destino}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(tarefa, f)
+        os.replace(tmp, destino)
+
+    def _mover(self, tarefa_id, origem, destino):
+        """Troca o estado; retorna False se outro processo chegou antes"""
+        try:
+            os.replace(self._caminho(origem, tarefa_id), self._caminho(destino, tarefa_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def status(self, tarefa_id):
+        for status in (CONCLUIDA, EXECUTANDO, PENDENTE, ERRO):
+            tarefa = self._ler(self._caminho(status, tarefa_id))
+            if tarefa:
+                tarefa['status'] = status
+                return tarefa
+        return None
+
+    def enfileirar(self, tipo, versao):
+        """Cria a tarefa, ou devolve a existente para o mesmo tipo e versão"""
+        tarefa_id = f'{tipo}-{versao}'
+        tarefa = self.status(tarefa_id)
+
+        if tarefa and tarefa['status'] != ERRO:
+            resultado = tarefa.get('resultado')
+            if tarefa['status'] != CONCLUIDA or not resultado or os.path.exists(resultado):
+                return tarefa
+
+        tarefa = {
+            'id': tarefa_id,
+            'tipo': tipo,
+            'versao': versao,
+            'resultado': None,
+            'erro': None,
+            'criado_em': datetime.utcnow().isoformat(),
+        }
+        for status in (ERRO, CONCLUIDA):
+            try:
+                os.remove(self._caminho(status, tarefa_id))
+            except FileNotFoundError:
+                pass
+        self._gravar(PENDENTE, tarefa)
+        return tarefa
+
+    def _recuperar_expiradas(self):
+        """Devolve à fila tarefas presas em execução (worker que morreu)"""
+        pasta = os.path.join(self.pasta, PASTAS[EXECUTANDO])
+        limite = time.time() - self.timeout
+        for nome in os.listdir(pasta):
+            try:
+                expirada = nome.endswith('.json') and os.path.getmtime(os.path.join(pasta, nome)) < limite
+            except FileNotFoundError:  # concluída nesse meio tempo
+                continue
+            if expirada:
+                self._mover(nome[:-5], EXECUTANDO, PENDENTE)
+
+    def reservar(self):
+        """Pega a tarefa pendente mais antiga; None se a fila estiver vazia"""
+        self._recuperar_expiradas()
+        pasta = os.path.join(self.pasta, PASTAS[PENDENTE])
+        nomes = []
+        for nome in os.listdir(pasta):
+            try:
+                if nome.endswith('.json'):
+                    nomes.append((os.path.getmtime(os.path.join(pasta, nome)), nome))
+            except FileNotFoundError:  # reservada por outro processo
+                pass
+
+        for _, nome in sorted(nomes):
+            tarefa_id = nome[:-5]
+            if self._mover(tarefa_id, PENDENTE, EXECUTANDO):
+                tarefa = self._ler(self._caminho(EXECUTANDO, tarefa_id))
+                if tarefa:
+                    # Atualiza o mtime (usado para detectar tarefas presas)
+                    self._gravar(EXECUTANDO, tarefa)
+                    return tarefa
+        return None
+
+    def renovar(self, tarefa_id):
+        """Atualiza o mtime da tarefa em execução (ainda não está presa)"""
+        with suppress(FileNotFoundError):
+            os.utime(self._caminho(EXECUTANDO, tarefa_id))
+
+    def concluir(self, tarefa, resultado):
+        tarefa['resultado'] = resultado
+        self._gravar(CONCLUIDA, tarefa)
+        # Pode já ter sido devolvida à fila e reservada por outro processo
+        with suppress(FileNotFoundError):
+            os.remove(self._caminho(EXECUTANDO, tarefa['id']))
+
+    def falhar(self, tarefa, erro):
+        tarefa['erro'] = erro
+        self._gravar(ERRO, tarefa)
+        with suppress(FileNotFoundError):
+            os.remove(self._caminho(EXECUTANDO, tarefa['id']))
+
+
+@contextmanager
+def _pulsacao(fila, tarefa):
+    """Renova a tarefa em execução a cada terço do timeout até o fim do bloco"""
+    parar = threading.Event()
+
+    def pulsar():
+        while not parar.wait(fila.timeout / 3):
+            fila.renovar(tarefa['id'])
+
+    thread = threading.Thread(target=pulsar, name=f"pulso-{tarefa['id']}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        parar.set()
+        thread.join()
+
+
+def executar(app, fila, tarefa):
+    """
+    Executa uma tarefa reservada e registra o resultado.
+
+    Nunca propaga exceções, para não derrubar o worker: se nem o estado
+    puder ser registrado, o erro é logado e a tarefa volta à fila pelo
+    timeout.
+    """
+    try:
+        try:
+            with _pulsacao(fila, tarefa), app.app_context():
+                resultado = TIPOS[tarefa['tipo']]['funcao'](tarefa['versao'])
+        except Exception as e:
+            app.logger.exception('Erro na tarefa %s', tarefa['id'])
+            fila.falhar(tarefa, str(e))
+        else:
+            fila.concluir(tarefa, resultado)
+    except Exception:
+        app.logger.exception('Erro ao registrar o estado da tarefa %s', tarefa['id'])
+
+
+class ExecutorLocal:
+    """Processa a fila num pool de threads do próprio processo"""
+
+    def __init__(self, app, fila, max_workers):
+        self.app = app
+        self.fila = fila
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tarefa')
+
+    def _drenar(self):
+        tarefa = self.fila.reservar()
+        if tarefa:
+            executar(self.app, self.fila, tarefa)
+
+    def acordar(self):
+        self._pool.submit(self._drenar)
+
+
+def get_fila():
+    """Fila de tarefas da aplicação"""
+    app = current_app._get_current_object()
+    if 'fila_tarefas' not in app.extensions:
+        pasta = app.config.get('TAREFAS_FOLDER') or os.path.join(app.config['RELATORIOS_FOLDER'], 'tarefas')
+        app.extensions['fila_tarefas'] = FilaArquivos(pasta, app.config['TAREFAS_TIMEOUT'])
+    return app.extensions['fila_tarefas']
+
+
+def submeter(tipo):
+    """Enfileira um relatório para a versão atual dos dados"""
+    app = current_app._get_current_object()
+    fila = get_fila()
+    tarefa = fila.enfileirar(tipo, TIPOS[tipo]['versao']())
+
+    if tarefa['status'] == PENDENTE and app.config['TAREFAS_MODO'] == 'local':
+        if 'executor_tarefas' not in app.extensions:
+            app.extensions['executor_tarefas'] = ExecutorLocal(app, fila, app.config['TAREFAS_WORKERS'])
+        app.extensions['executor_tarefas'].acordar()
+
+    return tarefa
+
+
+def rodar_worker(app, threads=2, intervalo=1.0, uma_vez=False, parar=None):
+    """
+    Laço do worker: reserva tarefas e executa em ``threads`` threads.
+
+    Com ``uma_vez`` processa o que estiver na fila e retorna o total.
+    """
+    with app.app_context():
+        fila = get_fila()
+
+    parar = parar or threading.Event()
+    processadas = 0
+
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='worker') as pool:
+        while not parar.is_set():
+            lote = []
+            for _ in range(threads):
+                tarefa = fila.reservar()
+                if not tarefa:
+                    break
+                lote.append(pool.submit(executar, app, fila, tarefa))
+
+            for futuro in lote:
+                futuro.result()
+            processadas += len(lote)
+
+            if not lote:
+                if uma_vez:
+                    break
+                parar.wait(intervalo)
+
+    return processadas
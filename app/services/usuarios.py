@@ -0,0 +1,60 @@
+"""
+Carregamento do usuário logado (``user_loader`` do Flask-Login).
+
+Em vez de consultar ``users`` a cada requisição (inclusive em cada foto
+de uma listagem), as colunas do usuário ficam no cache por
+``USUARIO_CACHE_TTL`` segundos. Qualquer alteração confirmada em ``User``
+(ativo, senha, último login...) remove as entradas.
+
+O objeto devolvido é ligado à sessão com ``merge(load=False)``, sem
+consulta; ``password_hash`` não vai para o cache e só é lido do banco se
+for acessado. Dentro da mesma requisição o usuário é carregado uma vez
+(``g``) e fica no identity map da sessão.
+
+Na falta do cache, a linha é lida do primário: o commit que invalidou a
+entrada pode ainda não ter chegado à réplica.
+"""
+from flask import current_app, g
+from sqlalchemy.orm import make_transient_to_detached
+
+from app import db
+from app.models.user import User
+from app.services.cache import get_cache, invalidar_ao_alterar
+from app.services.replica import ler_do_primario
+
+invalidar_ao_alterar(User, 'usuario:')
+
+# Colunas guardadas no cache (sem o hash da senha)
+COLUNAS = [c.key for c in User.__table__.columns if c.key != 'password_hash']
+
+
+def _colunas(user_id):
+    with ler_do_primario():
+        user = db.session.get(User, user_id)
+    if user is None:
+        return None
+    return {coluna: getattr(user, coluna) for coluna in COLUNAS}
+
+
+def carregar_usuario(user_id):
+    """Usuário pelo id, do cache quando possível; None se não existir"""
+    usuarios = g.setdefault('usuarios', {})
+    if user_id in usuarios:
+        return usuarios[user_id]
+
+    cache = get_cache()
+    chave = f'usuario:{user_id}'
+    dados = cache.get(chave)
+    if dados is None:
+        dados = _colunas(user_id)
+        if dados is not None:
+            cache.set(chave, dados, current_app.config['USUARIO_CACHE_TTL'])
+
+    user = None
+    if dados is not None:
+        user = User(**dados)
+        make_transient_to_detached(user)
+        user = db.session.merge(user, load=False)
+
+    usuarios[user_id] = user
+    return user
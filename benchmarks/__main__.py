@@ -0,0 +1,154 @@
+"""
+python -m benchmarks [opções]
+
+Cria (ou reaproveita) a base, mede as rotas e grava o resultado em JSON.
+Com ``--comparar`` mostra a variação de cada rota em relação a um
+resultado anterior.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks import dados, rotas
+
+
+def criar_app(banco, pasta):
+    """App com a configuração de benchmark (banco e pastas próprios)"""
+    import config as configuracao
+    from app import create_app
+
+    class BenchmarkConfig(configuracao.Config):
+        SQLALCHEMY_DATABASE_URI = banco
+        UPLOAD_FOLDER = os.path.join(pasta, 'uploads')
+        FOTO_FOLDER = os.path.join(pasta, 'uploads', 'fotos')
+        RELATORIOS_FOLDER = os.path.join(pasta, 'relatorios')
+        LOG_FILE = os.path.join(pasta, 'logs', 'app.log')
+        # Tarefas medidas diretamente, sem threads concorrendo com as rotas
+        TAREFAS_MODO = 'worker'
+
+    configuracao.config['benchmark'] = BenchmarkConfig
+    return create_app('benchmark')
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(atual, anterior):
+    """Linhas com a variação de p50/p90 e consultas por rota"""
+    linhas = [f'{"rota":32} {"p50 ms":>18} {"p90 ms":>18} {"consultas":>10}']
+    for nome, medida in atual['rotas'].items():
+        antes = anterior.get('rotas', {}).get(nome)
+        if not antes:
+            continue
+
+        def variacao(campo):
+            if not antes[campo]:
+                return f'{medida[campo]:>8}'
+            delta = (medida[campo] - antes[campo]) / antes[campo] * 100
+            return f'{medida[campo]:>8} ({delta:+6.1f}%)'
+
+        linhas.append(f'{nome:32} {variacao("p50_ms"):>18} {variacao("p90_ms"):>18} '
+                      f'{antes["consultas"]:>4} -> {medida["consultas"]:<3}')
+    return linhas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--banco', help='URI do banco (padrão: SQLite temporário)')
+    parser.add_argument('--alunos', type=int, default=10000, help='alunos gerados (padrão: 10000)')
+    parser.add_argument('--pets', type=float, default=1.5, help='média de pets por aluno (padrão: 1.5)')
+    parser.add_argument('--fotos', type=float, default=0.3, help='fração de alunos com foto (padrão: 0.3)')
+    parser.add_argument('--repeticoes', type=int, default=20, help='requisições medidas por rota')
+    parser.add_argument('--aquecimento', type=int, default=2, help='requisições descartadas por rota')
+    parser.add_argument('--rota', help='mede só as rotas/tarefas cujo nome contém este texto')
+    parser.add_argument('--recriar', action='store_true', help='apaga e recria as tabelas antes de gerar')
+    parser.add_argument('--saida', help='arquivo JSON do resultado (padrão: stdout)')
+    parser.add_argument('--comparar', help='resultado anterior (JSON) para comparação')
+    args = parser.parse_args(argv)
+
+    pasta = tempfile.mkdtemp(prefix='benchmark_')
+    banco = args.banco or 'sqlite:///' + os.path.join(pasta, 'benchmark.db')
+    app = criar_app(banco, pasta)
+
+    from app import db
+    from app.models.aluno import Aluno
+    from app.models.user import User
+
+    with app.app_context():
+        if args.recriar:
+            db.drop_all()
+        db.create_all()
+
+        usuario = User.query.filter_by(username='benchmark').first()
+        if not usuario:
+            usuario = User(username='benchmark', email='benchmark@exemplo.com')
+            usuario.set_password(os.urandom(16).hex())
+            db.session.add(usuario)
+            db.session.commit()
+        usuario_id = usuario.id
+
+        existentes = db.session.query(db.func.count(Aluno.id)).scalar()
+        if existentes < args.alunos:
+            inicio = time.perf_counter()
+            print(f'Gerando {args.alunos - existentes} alunos...', file=sys.stderr)
+            dados.gerar_base(
+                args.alunos - existentes, pets_por_aluno=args.pets, fotos=args.fotos,
+                callback=lambda a, p: print(f'  {a} alunos, {p} pets', file=sys.stderr)
+            )
+            print(f'Base gerada em {time.perf_counter() - inicio:.1f}s', file=sys.stderr)
+
+        totais = {
+            'alunos': db.session.query(db.func.count(Aluno.id)).scalar(),
+            'pets': db.session.execute(db.text('SELECT COUNT(*) FROM pets')).scalar(),
+        }
+
+    with app.app_context():
+        usuario = db.session.get(User, usuario_id)
+
+    medidas = rotas.executar(
+        app, usuario, repeticoes=args.repeticoes, aquecimento=args.aquecimento, filtro=args.rota,
+        callback=lambda nome, m: print(f'{nome:32} {m.get("p50_ms", m.get("duracao_ms")):>10} ms', file=sys.stderr)
+    )
+
+    resultado = {
+        'meta': {
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'commit': _commit_atual(),
+            'banco': banco.split(':', 1)[0],
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'repeticoes': args.repeticoes,
+            **totais,
+        },
+        **medidas,
+    }
+
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(texto)
+        print(f'Resultado gravado em {args.saida}', file=sys.stderr)
+    else:
+        print(texto)
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            anterior = json.load(f)
+        for linha in comparar(resultado, anterior):
+            print(linha, file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
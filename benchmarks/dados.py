@@ -0,0 +1,104 @@
+"""
+Gerador de dados para o benchmark.
+
+Os registros são inseridos em lotes (INSERT com vários VALUES), com ids
+explícitos para ligar os pets aos alunos sem consultas extras. A semente
+fixa gera sempre a mesma base para o mesmo tamanho.
+"""
+import random
+from datetime import date, timedelta
+from io import BytesIO
+
+from PIL import Image
+
+from app import db
+from app.models.aluno import Aluno
+from app.models.pet import Pet
+from app.services.cache import get_cache
+from app.services.estatisticas import reconstruir_estatisticas
+from app.services.fotos import get_arquivo_storage, gerar_miniaturas
+
+NOMES = ['Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela', 'Heitor', 'Isabela',
+         'João', 'Larissa', 'Marcos', 'Natália', 'Otávio', 'Paula', 'Rafael', 'Sofia', 'Tiago']
+SOBRENOMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Lima', 'Pereira', 'Costa', 'Rodrigues',
+              'Almeida', 'Nascimento', 'Carvalho', 'Gomes', 'Martins', 'Araújo', 'Ribeiro']
+CURSOS = ['Engenharia', 'Medicina', 'Direito', 'Arquitetura', 'Computação', 'Administração',
+          'Psicologia', 'Biologia', None]
+RACAS = ['Labrador', 'Siamês', 'Bulldog', 'Golden Retriever', 'Poodle', 'Persa', 'Vira-lata',
+         'Beagle', 'Shih Tzu', 'Maine Coon', None]
+APELIDOS = ['Rex', 'Mimi', 'Bob', 'Luna', 'Thor', 'Mel', 'Nina', 'Fred', 'Pipoca', 'Bidu']
+
+
+def _imagens(quantidade, rnd):
+    """Fotos JPEG distintas (600x600), usadas em rodízio pelos alunos"""
+    imagens = []
+    for _ in range(quantidade):
+        cor = tuple(rnd.randrange(256) for _ in range(3))
+        imagem = Image.new('RGB', (600, 600), cor)
+        for _ in range(20):
+            x, y = rnd.randrange(560), rnd.randrange(560)
+            imagem.paste(tuple(rnd.randrange(256) for _ in range(3)), (x, y, x + 40, y + 40))
+        saida = BytesIO()
+        imagem.save(saida, 'JPEG', quality=85)
+        imagens.append(saida.getvalue())
+    return imagens
+
+
+def _fotos(quantidade, rnd):
+    """Grava as fotos no storage em disco (com miniaturas) e retorna os hashes"""
+    storage = get_arquivo_storage()
+    hashes = []
+    for dados in _imagens(quantidade, rnd):
+        foto_hash = storage.gravar(dados)
+        gerar_miniaturas(dados, foto_hash)
+        hashes.append(foto_hash)
+    return hashes
+
+
+def gerar_base(alunos, pets_por_aluno=1.5, fotos=0.3, lote=5000, semente=42, callback=None):
+    """
+    Insere ``alunos`` alunos, em média ``pets_por_aluno`` pets cada, e
+    foto em uma fração ``fotos`` deles. Retorna (total_alunos, total_pets).
+    """
+    rnd = random.Random(semente)
+    hashes = _fotos(8, rnd) if fotos else []
+    inicio_id = (db.session.query(db.func.max(Aluno.id)).scalar() or 0) + 1
+    total_pets = 0
+    hoje = date.today()
+
+    for base in range(0, alunos, lote):
+        linhas_alunos, linhas_pets = [], []
+        for n in range(base, min(base + lote, alunos)):
+            aluno_id = inicio_id + n
+            foto_hash = rnd.choice(hashes) if hashes and rnd.random() < fotos else None
+            linhas_alunos.append({
+                'id': aluno_id,
+                'matricula': f'B{aluno_id:09d}',
+                'nome': f'{rnd.choice(NOMES)} {rnd.choice(SOBRENOMES)} {rnd.choice(SOBRENOMES)}',
+                'curso': rnd.choice(CURSOS),
+                'idade': rnd.randint(16, 45),
+                'sexo': rnd.choice('MF'),
+                'foto_hash': foto_hash,
+                'foto_filename': 'foto.jpg' if foto_hash else None,
+            })
+            # Distribuição em torno da média (0 a 2x)
+            for _ in range(int(rnd.uniform(0, 2 * pets_por_aluno) + 0.5)):
+                linhas_pets.append({
+                    'apelido': rnd.choice(APELIDOS),
+                    'raca': rnd.choice(RACAS),
+                    'data_nascimento': hoje - timedelta(days=rnd.randint(30, 5000)),
+                    'aluno_id': aluno_id,
+                })
+
+        db.session.execute(db.insert(Aluno), linhas_alunos)
+        if linhas_pets:
+            db.session.execute(db.insert(Pet), linhas_pets)
+        db.session.commit()
+        total_pets += len(linhas_pets)
+        if callback:
+            callback(base + len(linhas_alunos), total_pets)
+
+    # INSERT em massa não dispara os eventos que mantêm as contagens
+    reconstruir_estatisticas()
+    get_cache().clear()
+    return alunos, total_pets
@@ -0,0 +1,82 @@
+"""
+python -m benchmarks.inicializacao [--execucoes N] [--saida arquivo.json]
+
+Mede o tempo de subida de um worker: cada execução é um processo Python
+novo que importa a aplicação e chama ``create_app``. Registra também
+quais módulos pesados foram importados e se houve conexão com o banco
+(nenhuma é esperada: o esquema é criado por ``flask init-db``).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from app.services.metricas import percentil
+
+# Executado em cada processo filho; imprime um JSON com as medidas
+SCRIPT = r'''
+import json, sys, time
+inicio = time.perf_counter()
+import config
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+conexoes = []
+event.listen(Engine, 'connect', lambda *a: conexoes.append(1))
+class Inicializacao(config.Config):
+    SQLALCHEMY_DATABASE_URI = sys.argv[1]
+    LOG_FILE = sys.argv[2]
+config.config['inicializacao'] = Inicializacao
+from app import create_app
+importado = time.perf_counter()
+create_app('inicializacao')
+fim = time.perf_counter()
+print(json.dumps({
+    'import_ms': (importado - inicio) * 1000,
+    'create_app_ms': (fim - importado) * 1000,
+    'total_ms': (fim - inicio) * 1000,
+    'conexoes': len(conexoes),
+    'modulos': {m: m in sys.modules for m in ('fpdf', 'PIL', 'redis')},
+}))
+'''
+
+
+def medir(execucoes=10, banco='sqlite:///:memory:'):
+    log = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'logs', 'inicializacao.log')
+    amostras = []
+    for _ in range(execucoes):
+        saida = subprocess.run([sys.executable, '-c', SCRIPT, banco, log], capture_output=True,
+                               text=True, check=True)
+        amostras.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+
+    resultado = {'execucoes': execucoes}
+    for campo in ('import_ms', 'create_app_ms', 'total_ms'):
+        valores = sorted(a[campo] for a in amostras)
+        resultado[campo] = {
+            'p50': round(percentil(valores, 50), 1),
+            'p90': round(percentil(valores, 90), 1),
+            'min': round(valores[0], 1),
+        }
+    resultado['conexoes'] = max(a['conexoes'] for a in amostras)
+    resultado['modulos'] = amostras[-1]['modulos']
+    return resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.inicializacao', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--execucoes', type=int, default=10, help='processos medidos (padrão: 10)')
+    parser.add_argument('--banco', default='sqlite:///:memory:', help='URI do banco usada na configuração')
+    parser.add_argument('--saida', help='arquivo JSON do resultado (padrão: stdout)')
+    args = parser.parse_args(argv)
+
+    texto = json.dumps(medir(args.execucoes, args.banco), indent=2)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(texto)
+    else:
+        print(texto)
+
+
+if __name__ == '__main__':
+    main()
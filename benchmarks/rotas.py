@@ -0,0 +1,152 @@
+"""
+Medição das rotas com o test client.
+
+Cada rota é chamada ``aquecimento`` vezes sem medir (caches, miniaturas,
+user_loader) e depois ``repeticoes`` vezes medindo a latência. Uma
+requisição extra, com ``tracemalloc`` ligado, mede o pico de memória;
+ela fica fora das latências porque o tracemalloc deixa tudo mais lento.
+"""
+import time
+import tracemalloc
+
+from app import db
+from app.models.aluno import Aluno
+from app.services.consultas import ContadorConsultas, cliente_autenticado
+from app.services.estatisticas import reconstruir_estatisticas
+from app.services.metricas import percentil
+from app.services.relatorio_pdf import gerar_pdf_alunos
+from app.services.relatorios import gerar_mestre_detalhe
+
+
+def rotas_padrao():
+    """(nome, url) das rotas medidas; ids escolhidos na base atual"""
+    total = db.session.query(db.func.count(Aluno.id)).scalar()
+    meio = db.session.query(Aluno.id).order_by(Aluno.id).offset(total // 2).limit(1).scalar()
+    com_foto = db.session.query(Aluno.id, Aluno.foto_hash).filter(Aluno.foto_hash.isnot(None)).first()
+    ultima_pagina = max(1, (total + 9) // 10)
+
+    rotas = [
+        ('dashboard.index', '/'),
+        ('alunos.index', '/alunos/'),
+        ('alunos.index:pagina_meio', f'/alunos/?page={max(1, ultima_pagina // 2)}'),
+        ('alunos.index:cursor', '/alunos/?modo=cursor'),
+        ('alunos.index:busca', '/alunos/?search=silva'),
+        ('alunos.detalhes', f'/alunos/detalhes/{meio}' if meio else None),
+        ('pets.index', '/pets/'),
+        ('pets.index:busca', '/pets/?search=labrador'),
+        ('pets.por_aluno', f'/pets/api/por-aluno/{meio}' if meio else None),
+        ('relatorios.estatisticas', '/relatorios/estatisticas'),
+        ('relatorios.mestre_detalhe', '/relatorios/mestre-detalhe'),
+        ('relatorios.alunos_pdf', '/relatorios/alunos-pdf'),
+        ('alunos.exportar:json', '/alunos/api/exportar'),
+        ('alunos.exportar:ndjson', '/alunos/api/exportar?formato=ndjson'),
+        ('pets.exportar:json', '/pets/api/exportar'),
+    ]
+    if com_foto:
+        rotas.append(('alunos.foto:avatar', f'/alunos/foto/{com_foto.id}?size=avatar'))
+        rotas.append(('alunos.foto:original', f'/alunos/foto/{com_foto.id}'))
+    return [(nome, url) for nome, url in rotas if url]
+
+
+def _resumo(latencias):
+    ordenadas = sorted(latencias)
+    return {
+        'p50_ms': round(percentil(ordenadas, 50), 2),
+        'p90_ms': round(percentil(ordenadas, 90), 2),
+        'p99_ms': round(percentil(ordenadas, 99), 2),
+        'max_ms': round(ordenadas[-1], 2),
+        'media_ms': round(sum(ordenadas) / len(ordenadas), 2),
+    }
+
+
+def medir_rota(app, client, url, repeticoes=20, aquecimento=2):
+    """Latências, consultas SQL, pico de memória e bytes de uma rota"""
+    for _ in range(aquecimento):
+        client.get(url).get_data()
+
+    latencias = []
+    consultas = []
+    for _ in range(repeticoes):
+        # Contexto novo por requisição, como em verificar_rotas
+        with app.app_context(), ContadorConsultas() as contador:
+            inicio = time.perf_counter()
+            response = client.get(url)
+            corpo = response.get_data()  # consome respostas em streaming
+            latencias.append((time.perf_counter() - inicio) * 1000)
+        consultas.append(contador.total)
+
+    tracemalloc.start()
+    client.get(url).get_data()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'status': response.status_code,
+        'repeticoes': repeticoes,
+        **_resumo(latencias),
+        'consultas': max(consultas),
+        'pico_memoria_kb': round(pico / 1024, 1),
+        'bytes': len(corpo),
+    }
+
+
+def medir_funcao(app, funcao):
+    """
+    Tempo, consultas e pico de memória de uma tarefa da fila.
+
+    A tarefa roda duas vezes, com versões diferentes para não reaproveitar
+    o arquivo: a primeira mede o tempo, a segunda (com tracemalloc) a memória.
+    """
+    with app.app_context(), ContadorConsultas() as contador:
+        inicio = time.perf_counter()
+        funcao('benchmark-tempo')
+        duracao = (time.perf_counter() - inicio) * 1000
+
+    with app.app_context():
+        tracemalloc.start()
+        funcao('benchmark-memoria')
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        'duracao_ms': round(duracao, 2),
+        'consultas': contador.total,
+        'pico_memoria_kb': round(pico / 1024, 1),
+    }
+
+
+TAREFAS = {
+    'alunos_pdf': gerar_pdf_alunos,
+    'mestre_detalhe': gerar_mestre_detalhe,
+    'estatisticas': lambda versao: reconstruir_estatisticas(),
+}
+
+
+def executar(app, usuario, repeticoes=20, aquecimento=2, filtro=None, callback=None):
+    """
+    Mede as tarefas de relatório (antes das rotas: o PDF fica em cache
+    para ``relatorios.alunos_pdf``) e depois cada rota.
+    """
+    resultado = {'tarefas': {}, 'rotas': {}}
+
+    for nome, funcao in TAREFAS.items():
+        if filtro and filtro not in nome:
+            continue
+        resultado['tarefas'][nome] = medir_funcao(app, funcao)
+        if callback:
+            callback(f'tarefa {nome}', resultado['tarefas'][nome])
+
+    with app.app_context():
+        # PDF da versão atual, servido pela rota relatorios.alunos_pdf
+        gerar_pdf_alunos()
+        rotas = rotas_padrao()
+    client = cliente_autenticado(app, usuario)
+
+    for nome, url in rotas:
+        if filtro and filtro not in nome:
+            continue
+        resultado['rotas'][nome] = {'url': url, **medir_rota(app, client, url, repeticoes, aquecimento)}
+        if callback:
+            callback(nome, resultado['rotas'][nome])
+
+    return resultado
@@ -17,28 +17,116 @@ class Config:
     DB_NAME = os.environ.get('DB_NAME', 'escola_db')
     DB_USER = os.environ.get('DB_USER', 'root')
     DB_PASSWORD = os.environ.get('DB_PASSWORD', '')
+    # Driver MySQL: 'mysqlconnector' (padrão; usa a extensão C se instalada),
+    # 'mysqldb' (mysqlclient, em C) ou 'pymysql'
+    DB_DRIVER = os.environ.get('DB_DRIVER', 'mysqlconnector')
 
-    SQLALCHEMY_DATABASE_URI = (
-        f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@"
+    # DB_URI substitui a URI montada acima (ex.: sqlite:////tmp/escola.sqlite)
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DB_URI') or (
+        f"mysql+{DB_DRIVER}://{DB_USER}:{DB_PASSWORD}@"
         f"{DB_HOST}:{DB_PORT}/{DB_NAME}"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Pool de conexões (por processo: cada worker do gunicorn tem o seu)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 10))  # segundos esperando conexão livre
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # menor que o wait_timeout do MySQL
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'sim')
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': DB_POOL_PRE_PING,
+    }
+    # Réplica de leitura (opcional): DB_REPLICA_URI completa ou só DB_REPLICA_HOST
+    # (mesmo usuário, senha e banco do primário). GETs leem dela.
+    DB_REPLICA_HOST = os.environ.get('DB_REPLICA_HOST')
+    REPLICA_URI = os.environ.get('DB_REPLICA_URI') or (
+        f"mysql+{DB_DRIVER}://{DB_USER}:{DB_PASSWORD}@"
+        f"{DB_REPLICA_HOST}:{DB_PORT}/{DB_NAME}" if DB_REPLICA_HOST else None
+    )
+    # Após uma escrita, segundos em que o mesmo navegador lê do primário
+    REPLICA_FIXAR_SEGUNDOS = int(os.environ.get('REPLICA_FIXAR_SEGUNDOS', 5))
+    # /health: segundos em que o resultado do SELECT 1 é reaproveitado
+    HEALTH_CACHE_TTL = float(os.environ.get('HEALTH_CACHE_TTL', 5))
     SQLALCHEMY_ECHO = False
+    # db.create_all() no create_app (só para desenvolvimento rápido)
+    CRIAR_TABELAS_AO_INICIAR = os.environ.get('CRIAR_TABELAS_AO_INICIAR', 'false').lower() in ('1', 'true', 'sim')
 
     # Configurações de upload
     UPLOAD_FOLDER = os.path.join(basedir, 'app', 'static', 'uploads')
     MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))  # 16MB
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
+    # Armazenamento das fotos: 'arquivo' (disco, por SHA-256) ou 'banco' (BLOB)
+    FOTO_STORAGE = os.environ.get('FOTO_STORAGE', 'arquivo')
+    FOTO_FOLDER = os.environ.get('FOTO_FOLDER') or os.path.join(UPLOAD_FOLDER, 'fotos')
+    # Miniaturas geradas no upload (largura, altura); 2x o tamanho exibido
+    FOTO_MINIATURAS = {
+        'avatar': (80, 80),    # Listagem de alunos (40x40)
+        'card': (400, 400),    # Detalhes e formulário (200px)
+    }
+    # Uploads com mais pixels são recusados antes de decodificar a imagem
+    FOTO_MAX_PIXELS = int(os.environ.get('FOTO_MAX_PIXELS', 25_000_000))
+
+    # Cache HTTP: recursos com URL versionada (ex.: fotos com ?v=hash)
+    HTTP_CACHE_MAX_AGE_IMUTAVEL = int(os.environ.get('HTTP_CACHE_MAX_AGE_IMUTAVEL', 30 * 24 * 3600))  # 30 dias
+
+    # Cache de estatísticas e totais: 'memoria' (por processo) ou 'redis' (compartilhado)
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memoria')
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_MAX_ITENS = int(os.environ.get('CACHE_MAX_ITENS', 1000))  # chaves no cache em memória (LRU)
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 300))  # segundos
+    USUARIO_CACHE_TTL = int(os.environ.get('USUARIO_CACHE_TTL', 60))  # usuário logado (user_loader)
+
+    # Paginação das listagens: 'offset' (números de página) ou 'cursor' (keyset)
+    PAGINACAO_MODO = os.environ.get('PAGINACAO_MODO', 'offset')
+    PAGINACAO_TOTAL_TTL = int(os.environ.get('PAGINACAO_TOTAL_TTL', 60))  # segundos
+
+    # Busca textual: 'auto' (FULLTEXT no MySQL, FTS5 no SQLite) ou 'like'
+    BUSCA_BACKEND = os.environ.get('BUSCA_BACKEND', 'auto')
+    # Autocompletar do dono no formulário de pets: segundos em cache
+    SUGESTOES_ALUNOS_TTL = int(os.environ.get('SUGESTOES_ALUNOS_TTL', 30))
+    SUGESTOES_CACHE_CARACTERES = int(os.environ.get('SUGESTOES_CACHE_CARACTERES', 3))  # termos maiores não vão ao cache
+
+    # Exportação JSON/NDJSON em streaming: linhas lidas por consulta
+    EXPORTACAO_LOTE = int(os.environ.get('EXPORTACAO_LOTE', 1000))
+
+    # Importação em massa (CSV/NDJSON): linhas por INSERT
+    IMPORTACAO_LOTE = int(os.environ.get('IMPORTACAO_LOTE', 1000))
+
+    # Relatórios gerados (PDFs em cache por versão dos dados)
+    RELATORIOS_FOLDER = os.environ.get('RELATORIOS_FOLDER') or os.path.join(basedir, 'relatorios_gerados')
+
+    # Fila de relatórios: 'local' (threads do processo web) ou 'worker'
+    # (só o comando flask worker-relatorios executa as tarefas)
+    TAREFAS_MODO = os.environ.get('TAREFAS_MODO', 'local')
+    TAREFAS_FOLDER = os.environ.get('TAREFAS_FOLDER')  # padrão: RELATORIOS_FOLDER/tarefas
+    TAREFAS_WORKERS = int(os.environ.get('TAREFAS_WORKERS', 2))
+    TAREFAS_TIMEOUT = int(os.environ.get('TAREFAS_TIMEOUT', 600))  # segundos até reenfileirar tarefa presa
+
+    # Métricas por requisição (nº e tempo de SQL, templates, bytes): cabeçalho
+    # Server-Timing e /metricas (JSON, só para os usuários em METRICAS_USUARIOS)
+    METRICAS_ATIVAS = os.environ.get('METRICAS_ATIVAS', 'false').lower() in ('1', 'true', 'sim')
+    METRICAS_AMOSTRAS = int(os.environ.get('METRICAS_AMOSTRAS', 1000))  # por endpoint
+    METRICAS_USUARIOS = os.environ.get('METRICAS_USUARIOS', 'admin').split(',')
+
     # Configurações de sessão
     PERMANENT_SESSION_LIFETIME = timedelta(hours=2)
     SESSION_COOKIE_SECURE = False  # Mudar para True em produção com HTTPS
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
 
+    # Hash de senhas (werkzeug): 'scrypt:N:r:p' ou 'pbkdf2:sha256:iteracoes'.
+    # Hashes gerados com outros parâmetros são refeitos no próximo login.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+
     # Configurações de logging
-    LOG_FILE = os.path.join(basedir, 'logs', 'app.log')
-    LOG_LEVEL = 'INFO'
+    # Registros em JSON, gravados por uma thread (fila) com rotação por tamanho
+    LOG_FILE = os.environ.get('LOG_FILE') or os.path.join(basedir, 'logs', 'app.log')
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024))
+    LOG_BACKUP_COUNT = int(os.environ.get('LOG_BACKUP_COUNT', 5))
 
 class DevelopmentConfig(Config):
     """Configurações de desenvolvimento"""
@@ -49,6 +137,14 @@ class ProductionConfig(Config):
     """Configurações de produção"""
     DEBUG = False
     SESSION_COOKIE_SECURE = True
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        **Config.SQLALCHEMY_ENGINE_OPTIONS,
+        'pool_size': Config.DB_POOL_SIZE,
+        'max_overflow': Config.DB_MAX_OVERFLOW,
+        'pool_timeout': Config.DB_POOL_TIMEOUT,
+        # Reusa a conexão mais recente: as ociosas fecham no pool_recycle
+        'pool_use_lifo': True,
+    }
 
 config = {
     'development': DevelopmentConfig,
@@ -9,9 +9,7 @@ CREATE TABLE IF NOT EXISTS users (
     nome_completo VARCHAR(200),
     ativo BOOLEAN DEFAULT TRUE,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-    last_login DATETIME,
-    INDEX idx_username (username),
-    INDEX idx_email (email)
+    last_login DATETIME
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Tabela de alunos
@@ -24,10 +22,18 @@ CREATE TABLE IF NOT EXISTS alunos (
     sexo VARCHAR(1),
     foto LONGBLOB,
     foto_filename VARCHAR(255),
+    foto_hash VARCHAR(64),
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    INDEX idx_matricula (matricula),
-    INDEX idx_nome (nome)
+    INDEX idx_nome (nome),
+    INDEX idx_curso (curso),
+    INDEX idx_sexo (sexo),
+    INDEX idx_idade (idade),
+    INDEX idx_foto_hash (foto_hash),
+    INDEX idx_alunos_created_at (created_at),
+    INDEX idx_alunos_updated_at (updated_at),
+    FULLTEXT INDEX ft_alunos_busca (nome, curso),
+    FULLTEXT INDEX ft_alunos_nome (nome)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Tabela de pets
@@ -40,5 +46,28 @@ CREATE TABLE IF NOT EXISTS pets (
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (aluno_id) REFERENCES alunos(id) ON DELETE CASCADE,
-    INDEX idx_aluno (aluno_id)
+    INDEX idx_aluno (aluno_id),
+    INDEX idx_apelido (apelido),
+    INDEX idx_raca (raca),
+    INDEX idx_pets_updated_at (updated_at),
+    FULLTEXT INDEX ft_pets_busca (apelido, raca)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Tabela de estatísticas pré-agregadas (ver `flask reconstruir-estatisticas`)
+CREATE TABLE IF NOT EXISTS estatisticas (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    tipo VARCHAR(20) NOT NULL,
+    chave VARCHAR(100) NOT NULL DEFAULT '',
+    total INT NOT NULL DEFAULT 0,
+    atualizado_em DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_estatistica (tipo, chave),
+    INDEX idx_tipo_total (tipo, total)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- As colunas e os índices acima espelham os modelos (app/models). Bancos já
+-- existentes são atualizados com `flask db upgrade` (pasta migrations/), que
+-- cria alunos.foto_hash; depois, `flask migrar-fotos` move as fotos para o disco.
+
+-- Atualização de bancos já existentes (`flask reindexar-busca` cria os que faltarem)
+-- ALTER TABLE alunos ADD FULLTEXT INDEX ft_alunos_busca (nome, curso), ADD FULLTEXT INDEX ft_alunos_nome (nome);
+-- ALTER TABLE pets ADD FULLTEXT INDEX ft_pets_busca (apelido, raca);
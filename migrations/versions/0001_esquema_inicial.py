@@ -0,0 +1,178 @@
+"""Esquema inicial (usuários, alunos, pets, estatísticas e busca textual)
+
+Cria só as tabelas que ainda não existem, então bancos criados por
+create_tables.sql ou ``flask init-db`` mantêm as suas. A busca textual
+(FULLTEXT no MySQL, FTS5 no SQLite) é criada para todas as tabelas em que
+ainda não existe; no SQLite o índice FTS5 é preenchido com as linhas atuais.
+A tabela de estatísticas, quando criada aqui, já recebe as contagens dos
+alunos e pets existentes (as mesmas de ``flask reconstruir-estatisticas``).
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+MYSQL = {'mysql_engine': 'InnoDB', 'mysql_charset': 'utf8mb4', 'mysql_collate': 'utf8mb4_unicode_ci'}
+
+# Busca textual (ver app/services/busca.py)
+MYSQL_FULLTEXT = [
+    ('alunos', 'ft_alunos_busca', ['nome', 'curso']),
+    ('alunos', 'ft_alunos_nome', ['nome']),
+    ('pets', 'ft_pets_busca', ['apelido', 'raca']),
+]
+SQLITE_FTS = [
+    ('alunos', ['nome', 'curso']),
+    ('pets', ['apelido', 'raca']),
+]
+
+
+def _fts5(tabela, colunas):
+    lista = ', '.join(colunas)
+    novos = ', '.join(f'new.{c}' for c in colunas)
+    antigos = ', '.join(f'old.{c}' for c in colunas)
+    remover = f"INSERT INTO {tabela}_fts({tabela}_fts, rowid, {lista}) VALUES ('delete', old.id, {antigos});"
+    inserir = f'INSERT INTO {tabela}_fts(rowid, {lista}) VALUES (new.id, {novos});'
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {tabela}_fts USING fts5({lista}, "
+        f"content='{tabela}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        f'CREATE TRIGGER IF NOT EXISTS {tabela}_fts_ai AFTER INSERT ON {tabela} BEGIN {inserir} END',
+        f'CREATE TRIGGER IF NOT EXISTS {tabela}_fts_ad AFTER DELETE ON {tabela} BEGIN {remover} END',
+        f'CREATE TRIGGER IF NOT EXISTS {tabela}_fts_au AFTER UPDATE OF {lista} ON {tabela} BEGIN {remover} {inserir} END',
+    ]
+
+
+# Mesmas chaves de app/services/estatisticas.py (faixa_idade, '' = não informado)
+ESTATISTICAS = [
+    ("'curso'", "COALESCE(curso, '')", 'alunos', ''),
+    ("'sexo'", "COALESCE(sexo, '')", 'alunos', ''),
+    ("'faixa_idade'",
+     "CASE WHEN idade < 18 THEN 'Menor de 18' WHEN idade <= 25 THEN '18-25' "
+     "WHEN idade <= 35 THEN '26-35' ELSE 'Maior de 35' END",
+     'alunos', 'WHERE idade IS NOT NULL'),
+    ("'raca'", "COALESCE(raca, '')", 'pets', ''),
+]
+
+
+def _contar_estatisticas():
+    for tipo, chave, tabela, filtro in ESTATISTICAS:
+        op.execute(
+            f'INSERT INTO estatisticas (tipo, chave, total, atualizado_em) '
+            f'SELECT {tipo}, {chave}, COUNT(*), CURRENT_TIMESTAMP FROM {tabela} {filtro} GROUP BY {chave}'
+        )
+
+
+def _fulltext_existentes(bind):
+    return set(bind.exec_driver_sql(
+        "SELECT DISTINCT index_name FROM information_schema.statistics "
+        "WHERE table_schema = DATABASE() AND index_type = 'FULLTEXT'"
+    ).scalars())
+
+
+def _criar_busca(bind):
+    if bind.dialect.name == 'mysql':
+        existentes = _fulltext_existentes(bind)
+        for tabela, nome, colunas in MYSQL_FULLTEXT:
+            if nome not in existentes:
+                op.execute(f'ALTER TABLE {tabela} ADD FULLTEXT INDEX {nome} ({", ".join(colunas)})')
+    elif bind.dialect.name == 'sqlite':
+        for tabela, colunas in SQLITE_FTS:
+            nova = not sa.inspect(bind).has_table(f'{tabela}_fts')
+            for comando in _fts5(tabela, colunas):
+                op.execute(comando)
+            if nova:
+                # Tabela já populada: o FTS5 externo só vê as linhas indexadas
+                op.execute(f"INSERT INTO {tabela}_fts({tabela}_fts) VALUES ('rebuild')")
+
+
+def upgrade():
+    bind = op.get_bind()
+    existentes = set(sa.inspect(bind).get_table_names())
+
+    if 'users' not in existentes:
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('username', sa.String(80), nullable=False),
+            sa.Column('email', sa.String(120), nullable=False),
+            sa.Column('password_hash', sa.String(255), nullable=False),
+            sa.Column('nome_completo', sa.String(200)),
+            sa.Column('ativo', sa.Boolean()),
+            sa.Column('created_at', sa.DateTime()),
+            sa.Column('last_login', sa.DateTime()),
+            **MYSQL
+        )
+        op.create_index('ix_users_username', 'users', ['username'], unique=True)
+        op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    if 'alunos' not in existentes:
+        op.create_table(
+            'alunos',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('matricula', sa.String(20), nullable=False),
+            sa.Column('nome', sa.String(200), nullable=False),
+            sa.Column('curso', sa.String(100)),
+            sa.Column('idade', sa.Integer()),
+            sa.Column('sexo', sa.String(1)),
+            sa.Column('foto', sa.LargeBinary().with_variant(mysql.LONGBLOB(), 'mysql')),
+            sa.Column('foto_filename', sa.String(255)),
+            sa.Column('foto_hash', sa.String(64)),
+            sa.Column('created_at', sa.DateTime()),
+            sa.Column('updated_at', sa.DateTime()),
+            **MYSQL
+        )
+        op.create_index('ix_alunos_matricula', 'alunos', ['matricula'], unique=True)
+        op.create_index('idx_nome', 'alunos', ['nome'])
+        op.create_index('idx_foto_hash', 'alunos', ['foto_hash'])
+
+    if 'pets' not in existentes:
+        op.create_table(
+            'pets',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('apelido', sa.String(100), nullable=False),
+            sa.Column('raca', sa.String(100)),
+            sa.Column('data_nascimento', sa.Date()),
+            sa.Column('aluno_id', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime()),
+            sa.Column('updated_at', sa.DateTime()),
+            sa.ForeignKeyConstraint(['aluno_id'], ['alunos.id'], name='fk_pets_aluno_id_alunos', ondelete='CASCADE'),
+            **MYSQL
+        )
+        op.create_index('idx_aluno', 'pets', ['aluno_id'])
+
+    if 'estatisticas' not in existentes:
+        op.create_table(
+            'estatisticas',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('tipo', sa.String(20), nullable=False),
+            sa.Column('chave', sa.String(100), nullable=False, server_default=''),
+            sa.Column('total', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('atualizado_em', sa.DateTime()),
+            sa.UniqueConstraint('tipo', 'chave', name='uq_estatistica'),
+            **MYSQL
+        )
+        op.create_index('idx_tipo_total', 'estatisticas', ['tipo', 'total'])
+        if 'alunos' in existentes:
+            _contar_estatisticas()
+
+    _criar_busca(bind)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for tabela, _ in SQLITE_FTS:
+            op.execute(f'DROP TABLE IF EXISTS {tabela}_fts')
+    op.drop_table('estatisticas')
+    op.drop_table('pets')
+    op.drop_table('alunos')
+    op.drop_table('users')
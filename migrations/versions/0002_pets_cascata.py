@@ -0,0 +1,66 @@
+"""pets.aluno_id com ON DELETE CASCADE
+
+Bancos criados antes da exclusão pela cascata têm a chave estrangeira sem
+ON DELETE; a exclusão de um aluno com pets falharia.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:05:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+NOME_FK = 'fk_pets_aluno_id_alunos'
+# No SQLite a chave costuma não ter nome: a convenção dá um nome na cópia
+CONVENCAO = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+
+def _chave_estrangeira():
+    for fk in sa.inspect(op.get_bind()).get_foreign_keys('pets'):
+        if fk['referred_table'] == 'alunos' and fk['constrained_columns'] == ['aluno_id']:
+            return fk
+    return None
+
+
+def _recriar_triggers_fts():
+    """O batch do SQLite recria a tabela pets e descarta os triggers da busca"""
+    if not op.get_bind().exec_driver_sql("SELECT 1 FROM sqlite_master WHERE name = 'pets_fts'").first():
+        return
+    remover = ("INSERT INTO pets_fts(pets_fts, rowid, apelido, raca) "
+               "VALUES ('delete', old.id, old.apelido, old.raca);")
+    inserir = 'INSERT INTO pets_fts(rowid, apelido, raca) VALUES (new.id, new.apelido, new.raca);'
+    op.execute(f'CREATE TRIGGER IF NOT EXISTS pets_fts_ai AFTER INSERT ON pets BEGIN {inserir} END')
+    op.execute(f'CREATE TRIGGER IF NOT EXISTS pets_fts_ad AFTER DELETE ON pets BEGIN {remover} END')
+    op.execute('CREATE TRIGGER IF NOT EXISTS pets_fts_au AFTER UPDATE OF apelido, raca ON pets '
+               f'BEGIN {remover} {inserir} END')
+
+
+def _trocar_chave(ondelete):
+    fk = _chave_estrangeira()
+    if fk is None or (fk.get('options') or {}).get('ondelete', '').upper() == (ondelete or '').upper():
+        return
+
+    if op.get_bind().dialect.name == 'sqlite':
+        with op.batch_alter_table('pets', recreate='always', naming_convention=CONVENCAO) as batch:
+            batch.drop_constraint(fk['name'] or NOME_FK, type_='foreignkey')
+            batch.create_foreign_key(NOME_FK, 'alunos', ['aluno_id'], ['id'], ondelete=ondelete)
+        _recriar_triggers_fts()
+    else:
+        op.drop_constraint(fk['name'], 'pets', type_='foreignkey')
+        op.create_foreign_key(NOME_FK, 'pets', 'alunos', ['aluno_id'], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    _trocar_chave('CASCADE')
+
+
+def downgrade():
+    _trocar_chave(None)
@@ -0,0 +1,34 @@
+"""alunos.foto_hash (fotos em disco, endereçadas pelo SHA-256)
+
+Bancos anteriores às fotos em disco não têm a coluna; sem ela toda
+consulta de Aluno falha. Depois do upgrade, ``flask migrar-fotos`` move
+as fotos em BLOB para o disco e preenche o hash.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 12:07:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspetor = sa.inspect(op.get_bind())
+    if not any(c['name'] == 'foto_hash' for c in inspetor.get_columns('alunos')):
+        op.add_column('alunos', sa.Column('foto_hash', sa.String(64)))
+    if not any(i['name'] == 'idx_foto_hash' for i in inspetor.get_indexes('alunos')):
+        op.create_index('idx_foto_hash', 'alunos', ['foto_hash'])
+
+
+def downgrade():
+    op.drop_index('idx_foto_hash', table_name='alunos')
+    with op.batch_alter_table('alunos') as batch:
+        batch.drop_column('foto_hash')
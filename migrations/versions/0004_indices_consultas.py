@@ -0,0 +1,71 @@
+"""Índices das consultas frequentes
+
+Um índice para cada filtro, ordenação e agrupamento das listagens, do
+dashboard, das estatísticas e das exportações (conferidos com
+``flask verificar-indices``). Índices equivalentes com outro nome (criados
+à mão, ou o idx_matricula de create_tables.sql, que repetia o UNIQUE) são
+substituídos, para o banco não manter a mesma árvore duas vezes.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 12:10:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+INDICES = [
+    ('alunos', 'idx_nome', ['nome']),
+    ('alunos', 'idx_curso', ['curso']),
+    ('alunos', 'idx_sexo', ['sexo']),
+    ('alunos', 'idx_idade', ['idade']),
+    ('alunos', 'idx_foto_hash', ['foto_hash']),
+    ('alunos', 'idx_alunos_created_at', ['created_at']),
+    ('alunos', 'idx_alunos_updated_at', ['updated_at']),
+    ('pets', 'idx_aluno', ['aluno_id']),
+    ('pets', 'idx_apelido', ['apelido']),
+    ('pets', 'idx_raca', ['raca']),
+    ('pets', 'idx_pets_updated_at', ['updated_at']),
+]
+# Criados por revisões anteriores: o downgrade não remove
+INICIAIS = {'idx_nome', 'idx_foto_hash', 'idx_aluno'}
+
+
+def _indices(tabela):
+    return sa.inspect(op.get_bind()).get_indexes(tabela)
+
+
+def _simples(indice):
+    """Índice comum (nem UNIQUE nem FULLTEXT)"""
+    return not indice['unique'] and not indice.get('dialect_options', {}).get('mysql_prefix')
+
+
+def upgrade():
+    for tabela, nome, colunas in INDICES:
+        existentes = _indices(tabela)
+        if not any(i['name'] == nome for i in existentes):
+            # Cria antes de remover: no MySQL a chave estrangeira precisa de um índice
+            op.create_index(nome, tabela, colunas)
+        for indice in existentes:
+            if indice['name'] != nome and indice['column_names'] == colunas and _simples(indice):
+                op.drop_index(indice['name'], table_name=tabela)
+
+    # Repetiam um índice UNIQUE nas mesmas colunas
+    for tabela, nome in [('alunos', 'idx_matricula'), ('users', 'idx_username'), ('users', 'idx_email')]:
+        existentes = _indices(tabela)
+        indice = next((i for i in existentes if i['name'] == nome), None)
+        if indice and any(i['unique'] and i['column_names'] == indice['column_names'] for i in existentes):
+            op.drop_index(nome, table_name=tabela)
+
+
+def downgrade():
+    for tabela, nome, _ in reversed(INDICES):
+        if nome not in INICIAIS and any(i['name'] == nome for i in _indices(tabela)):
+            op.drop_index(nome, table_name=tabela)
@@ -3,8 +3,10 @@
 Script principal para executar a aplicação Flask
 """
 import os
+import sys
+import click
 from app import create_app, db
-from app.models import User, Aluno, Pet
+from app.models import User, Aluno, Pet, Estatistica
 
 # Criar instância da aplicação
 app = create_app(os.getenv('FLASK_ENV', 'development'))
@@ -16,7 +18,8 @@ def make_shell_context():
         'db': db,
         'User': User,
         'Aluno': Aluno,
-        'Pet': Pet
+        'Pet': Pet,
+        'Estatistica': Estatistica
     }
 
 @app.cli.command()
@@ -55,41 +58,177 @@ def create_admin():
 @app.cli.command()
 def seed_db():
     """Popula o banco com dados de exemplo"""
-    from app.models.aluno import Aluno
-    from app.models.pet import Pet
-    from datetime import date
+    from app.services.importacao import importar_alunos, importar_pets
 
     print('Populando banco de dados...')
 
-    # Criar alunos de exemplo
+    # Criar alunos de exemplo (matrículas já existentes são ignoradas)
     alunos_exemplo = [
-        Aluno(matricula='2024001', nome='João Silva', curso='Engenharia', idade=20, sexo='M'),
-        Aluno(matricula='2024002', nome='Maria Santos', curso='Medicina', idade=22, sexo='F'),
-        Aluno(matricula='2024003', nome='Pedro Oliveira', curso='Direito', idade=21, sexo='M'),
-        Aluno(matricula='2024004', nome='Ana Costa', curso='Arquitetura', idade=23, sexo='F'),
-        Aluno(matricula='2024005', nome='Carlos Souza', curso='Engenharia', idade=19, sexo='M'),
+        {'matricula': '2024001', 'nome': 'João Silva', 'curso': 'Engenharia', 'idade': 20, 'sexo': 'M'},
+        {'matricula': '2024002', 'nome': 'Maria Santos', 'curso': 'Medicina', 'idade': 22, 'sexo': 'F'},
+        {'matricula': '2024003', 'nome': 'Pedro Oliveira', 'curso': 'Direito', 'idade': 21, 'sexo': 'M'},
+        {'matricula': '2024004', 'nome': 'Ana Costa', 'curso': 'Arquitetura', 'idade': 23, 'sexo': 'F'},
+        {'matricula': '2024005', 'nome': 'Carlos Souza', 'curso': 'Engenharia', 'idade': 19, 'sexo': 'M'},
     ]
 
-    for aluno in alunos_exemplo:
-        db.session.add(aluno)
-
-    db.session.commit()
-    print(f'{len(alunos_exemplo)} alunos criados!')
+    resultado = importar_alunos(enumerate(alunos_exemplo, start=1))
+    print(f'{resultado.inseridos} alunos criados!')
+    if not resultado.inseridos:
+        print('Dados de exemplo já existentes; nada a fazer.')
+        return
 
-    # Criar pets de exemplo
+    # Criar pets de exemplo (dono pela matrícula)
     pets_exemplo = [
-        Pet(apelido='Rex', raca='Labrador', data_nascimento=date(2020, 5, 15), aluno_id=1),
-        Pet(apelido='Mimi', raca='Siamês', data_nascimento=date(2021, 3, 20), aluno_id=2),
-        Pet(apelido='Bob', raca='Bulldog', data_nascimento=date(2019, 8, 10), aluno_id=3),
-        Pet(apelido='Luna', raca='Golden Retriever', data_nascimento=date(2020, 12, 5), aluno_id=4),
+        {'apelido': 'Rex', 'raca': 'Labrador', 'data_nascimento': '2020-05-15', 'matricula': '2024001'},
+        {'apelido': 'Mimi', 'raca': 'Siamês', 'data_nascimento': '2021-03-20', 'matricula': '2024002'},
+        {'apelido': 'Bob', 'raca': 'Bulldog', 'data_nascimento': '2019-08-10', 'matricula': '2024003'},
+        {'apelido': 'Luna', 'raca': 'Golden Retriever', 'data_nascimento': '2020-12-05', 'matricula': '2024004'},
     ]
 
-    for pet in pets_exemplo:
-        db.session.add(pet)
-
-    db.session.commit()
-    print(f'{len(pets_exemplo)} pets criados!')
+    resultado = importar_pets(enumerate(pets_exemplo, start=1))
+    print(f'{resultado.inseridos} pets criados!')
     print('Banco de dados populado com sucesso!')
 
+def _importar(tipo, arquivo, formato, lote):
+    from app.services.importacao import importar_arquivo
+
+    print(f'Importando {tipo} de {arquivo}...')
+    with open(arquivo, 'rb') as f:
+        resultado = importar_arquivo(
+            tipo, f, nome_arquivo=arquivo, formato=formato, lote=lote or app.config['IMPORTACAO_LOTE'],
+            callback=lambda r: print(f'  {r.lidos} linhas lidas, {r.inseridos} inseridas...')
+        )
+
+    print(f'{resultado.inseridos} {tipo} importados ({resultado.duplicados} duplicados, '
+          f'{resultado.invalidos} inválidos).')
+    for erro in resultado.erros:
+        print(f'  {erro}')
+
+@app.cli.command()
+@click.argument('arquivo', type=click.Path(exists=True, dir_okay=False))
+@click.option('--formato', type=click.Choice(['csv', 'ndjson']), help='Padrão: pela extensão do arquivo')
+@click.option('--lote', type=int, help='Linhas por INSERT (padrão: IMPORTACAO_LOTE)')
+def import_alunos(arquivo, formato, lote):
+    """Importa alunos de um arquivo CSV ou NDJSON"""
+    _importar('alunos', arquivo, formato, lote)
+
+@app.cli.command()
+@click.argument('arquivo', type=click.Path(exists=True, dir_okay=False))
+@click.option('--formato', type=click.Choice(['csv', 'ndjson']), help='Padrão: pela extensão do arquivo')
+@click.option('--lote', type=int, help='Linhas por INSERT (padrão: IMPORTACAO_LOTE)')
+def import_pets(arquivo, formato, lote):
+    """Importa pets de um arquivo CSV ou NDJSON (dono pela coluna matricula)"""
+    _importar('pets', arquivo, formato, lote)
+
+@app.cli.command()
+@click.option('--lote', default=100, show_default=True, help='Alunos por lote')
+def migrar_fotos(lote):
+    """Move as fotos em BLOB para o storage em disco"""
+    from app.services.fotos import migrar_fotos_para_arquivo
+
+    colunas = {c['name'] for c in db.inspect(db.engine).get_columns('alunos')}
+    if 'foto_hash' not in colunas:
+        print('Coluna alunos.foto_hash não existe: rode `flask db upgrade` antes.')
+        sys.exit(1)
+
+    print('Migrando fotos para o disco...')
+    total = migrar_fotos_para_arquivo(
+        lote=lote,
+        callback=lambda n: print(f'  {n} fotos migradas...')
+    )
+    print(f'{total} fotos migradas com sucesso!')
+
+@app.cli.command()
+def reconstruir_estatisticas():
+    """Recalcula a tabela de estatísticas a partir de alunos e pets"""
+    from app.services.estatisticas import reconstruir_estatisticas as reconstruir
+
+    total = reconstruir()
+    print(f'Estatísticas reconstruídas ({total} linhas)!')
+
+@app.cli.command()
+@click.option('--threads', default=2, show_default=True, help='Tarefas executadas em paralelo')
+@click.option('--intervalo', default=1.0, show_default=True, help='Segundos entre consultas à fila vazia')
+@click.option('--uma-vez', is_flag=True, help='Processa o que estiver na fila e termina')
+def worker_relatorios(threads, intervalo, uma_vez):
+    """Executa as tarefas da fila de relatórios (use com TAREFAS_MODO=worker)"""
+    from app.services.tarefas import rodar_worker
+
+    print(f'Worker de relatórios iniciado ({threads} threads). Ctrl+C para sair.')
+    try:
+        total = rodar_worker(app, threads=threads, intervalo=intervalo, uma_vez=uma_vez)
+    except KeyboardInterrupt:
+        print('Worker interrompido.')
+        return
+    print(f'{total} tarefas processadas.')
+
+@app.cli.command()
+def reindexar_busca():
+    """Cria/reconstrói os índices de busca textual"""
+    from app.services.busca import get_busca
+
+    get_busca().reindexar()
+    print('Índices de busca reconstruídos!')
+
+@app.cli.command()
+def sincronizar_replica():
+    """Copia o banco primário para a réplica (SQLite, desenvolvimento)"""
+    from app.services.replica import sincronizar_sqlite
+
+    try:
+        sincronizar_sqlite(db)
+    except ValueError as e:
+        print(str(e))
+        sys.exit(1)
+    print('Réplica sincronizada com o primário!')
+
+@app.cli.command()
+@click.option('--usuario', default='admin', show_default=True, help='Usuário usado nas requisições')
+def verificar_consultas(usuario):
+    """Confere o número de comandos SQL por rota no banco configurado (ver tests/)"""
+    from app.models.user import User
+    from app.services.consultas import verificar_rotas
+
+    user = User.query.filter_by(username=usuario).first()
+    if not user:
+        print(f'Usuário {usuario} não encontrado!')
+        sys.exit(1)
+
+    falhas = 0
+    for endpoint, status, total, esperado in verificar_rotas(app, user):
+        ok = status == 200 and total == esperado
+        falhas += not ok
+        print(f'{"OK   " if ok else "FALHA"} {endpoint:30} HTTP {status}  {total} consultas (esperado {esperado})')
+
+    if falhas:
+        print(f'{falhas} rota(s) fora do orçamento de consultas!')
+        sys.exit(1)
+    print('Todas as rotas dentro do orçamento de consultas.')
+
+@app.cli.command()
+@click.option('--usuario', default='admin', show_default=True, help='Usuário usado nas requisições')
+def verificar_indices(usuario):
+    """Roda o EXPLAIN das consultas das rotas e aponta varreduras completas de tabela"""
+    from app.models.user import User
+    from app.services.consultas import verificar_indices as verificar
+
+    user = User.query.filter_by(username=usuario).first()
+    if not user:
+        print(f'Usuário {usuario} não encontrado!')
+        sys.exit(1)
+
+    falhas = 0
+    for origem, status, varreduras in verificar(app, user):
+        ok = status == 200 and not varreduras
+        falhas += not ok
+        print(f'{"OK   " if ok else "FALHA"} {origem:50} HTTP {status}')
+        for tabela, comando in varreduras:
+            print(f'      varredura completa em {tabela}: {" ".join(comando.split())[:150]}')
+
+    if falhas:
+        print(f'{falhas} consulta(s) sem índice!')
+        sys.exit(1)
+    print('Todas as consultas usam índices.')
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
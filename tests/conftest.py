@@ -0,0 +1,57 @@
+"""
+Fixtures dos testes: app com SQLite em memória e pastas temporárias.
+
+O esquema vem de ``db.create_all()``; testes marcados com
+``@pytest.mark.migracoes`` usam ``flask db upgrade`` (pasta migrations/).
+``@pytest.mark.migracoes(esquema=sql)`` roda o SQL antes do upgrade, para
+testar a atualização de um banco já existente.
+"""
+import os
+
+import pytest
+from flask_migrate import upgrade
+
+import config as configuracao
+from app import create_app, db
+from app.models.user import User
+
+MIGRACOES = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations')
+
+
+@pytest.fixture
+def app(request, tmp_path):
+    class TestConfig(configuracao.Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = 'sqlite://'
+        UPLOAD_FOLDER = str(tmp_path / 'uploads')
+        FOTO_FOLDER = str(tmp_path / 'uploads' / 'fotos')
+        RELATORIOS_FOLDER = str(tmp_path / 'relatorios')
+        LOG_FILE = str(tmp_path / 'logs' / 'app.log')
+        # Sem threads da fila concorrendo com as requisições do teste
+        TAREFAS_MODO = 'worker'
+
+    configuracao.config['teste'] = TestConfig
+    app = create_app('teste')
+    with app.app_context():
+        migracoes = request.node.get_closest_marker('migracoes')
+        if migracoes:
+            esquema = migracoes.kwargs.get('esquema')
+            if esquema:
+                with db.engine.begin() as conn:
+                    for comando in filter(str.strip, esquema.split(';')):
+                        conn.exec_driver_sql(comando)
+            upgrade(directory=MIGRACOES)
+        else:
+            db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def usuario(app):
+    usuario = User(username='teste', email='teste@escola.com')
+    usuario.set_password('teste123')
+    db.session.add(usuario)
+    db.session.commit()
+    return usuario
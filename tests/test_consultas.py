@@ -0,0 +1,138 @@
+"""
+Número de comandos SQL por rota (ORCAMENTO_CONSULTAS) e uso de índices.
+
+Cada rota roda com N e com 2N alunos: a contagem tem de ser a mesma nas
+duas e igual à do orçamento. Uma consulta por linha (N+1) muda a
+contagem. N fica abaixo do tamanho das páginas, para todas as linhas
+aparecerem nas duas medições.
+
+O EXPLAIN de cada SELECT (``verificar_indices``) roda no esquema criado
+pelas migrações, que tem de coincidir com os modelos e com
+create_tables.sql, também quando as migrações atualizam um banco criado
+antes delas (``ESQUEMA_ANTIGO``).
+"""
+import os
+import re
+
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+
+from app import db
+from app.models.aluno import Aluno
+from app.models.estatistica import Estatistica
+from app.models.pet import Pet
+from app.services.busca import get_busca
+from app.services.consultas import ORCAMENTO_CONSULTAS, verificar_indices, verificar_rotas
+from app.services.estatisticas import reconstruir_estatisticas
+from benchmarks.dados import gerar_base
+
+N = 4
+RAIZ = os.path.dirname(os.path.dirname(__file__))
+
+
+def _contagens(app, usuario):
+    contagens = {}
+    for endpoint, status, total, _ in verificar_rotas(app, usuario):
+        assert status == 200, endpoint
+        contagens[endpoint] = total
+    return contagens
+
+
+@pytest.fixture
+def contagens(app, usuario):
+    gerar_base(N, fotos=0)
+    com_n = _contagens(app, usuario)
+    gerar_base(N, fotos=0)
+    return com_n, _contagens(app, usuario)
+
+
+@pytest.mark.parametrize('endpoint', ORCAMENTO_CONSULTAS)
+def test_consultas_constantes(contagens, endpoint):
+    com_n, com_2n = contagens
+    assert com_n[endpoint] == com_2n[endpoint], f'{endpoint}: N+1 ({com_n[endpoint]} -> {com_2n[endpoint]})'
+    assert com_2n[endpoint] == ORCAMENTO_CONSULTAS[endpoint]
+
+
+# Índices: EXPLAIN das mesmas rotas, no esquema das migrações
+
+def _indices_sql():
+    """{(tabela, nome): colunas} dos índices comuns de create_tables.sql"""
+    with open(os.path.join(RAIZ, 'create_tables.sql'), encoding='utf-8') as f:
+        sql = f.read()
+    indices = {}
+    for tabela, corpo in re.findall(r'CREATE TABLE IF NOT EXISTS (\w+) \((.*?)\) ENGINE', sql, re.S):
+        for nome, colunas in re.findall(r'^\s*INDEX (\w+) \(([^)]*)\)', corpo, re.M):
+            indices[(tabela, nome)] = [c.strip() for c in colunas.split(',')]
+    return indices
+
+
+def _indices_modelos():
+    return {
+        (tabela.name, indice.name): [c.name for c in indice.columns]
+        for tabela in db.metadata.tables.values()
+        for indice in tabela.indexes
+        if not indice.unique
+    }
+
+
+@pytest.mark.migracoes
+def test_migracoes_iguais_aos_modelos(app):
+    with db.engine.connect() as conn:
+        contexto = MigrationContext.configure(conn, opts={'compare_type': True})
+        diferencas = compare_metadata(contexto, db.metadata)
+    # Tabelas da busca textual (FTS5) não têm modelo
+    diferencas = [d for d in diferencas if not (d[0] == 'remove_table' and '_fts' in d[1].name)]
+    assert diferencas == []
+
+
+# ``flask init-db`` antes das migrações: sem estatisticas, foto_hash e busca
+ESQUEMA_ANTIGO = """
+CREATE TABLE users (id INTEGER NOT NULL, username VARCHAR(80) NOT NULL, email VARCHAR(120) NOT NULL,
+    password_hash VARCHAR(255) NOT NULL, nome_completo VARCHAR(200), ativo BOOLEAN, created_at DATETIME,
+    last_login DATETIME, PRIMARY KEY (id));
+CREATE UNIQUE INDEX ix_users_email ON users (email);
+CREATE UNIQUE INDEX ix_users_username ON users (username);
+CREATE TABLE alunos (id INTEGER NOT NULL, matricula VARCHAR(20) NOT NULL, nome VARCHAR(200) NOT NULL,
+    curso VARCHAR(100), idade INTEGER, sexo VARCHAR(1), foto BLOB, foto_filename VARCHAR(255),
+    created_at DATETIME, updated_at DATETIME, PRIMARY KEY (id));
+CREATE UNIQUE INDEX ix_alunos_matricula ON alunos (matricula);
+CREATE TABLE pets (id INTEGER NOT NULL, apelido VARCHAR(100) NOT NULL, raca VARCHAR(100), data_nascimento DATE,
+    aluno_id INTEGER NOT NULL, created_at DATETIME, updated_at DATETIME, PRIMARY KEY (id),
+    FOREIGN KEY(aluno_id) REFERENCES alunos (id));
+INSERT INTO alunos (id, matricula, nome, curso, idade, sexo) VALUES (1, '2020001', 'Maria Souza', 'Direito', 22, 'F');
+INSERT INTO alunos (id, matricula, nome, curso, idade, sexo) VALUES (2, '2020002', 'João Lima', 'Direito', 40, NULL);
+INSERT INTO alunos (id, matricula, nome, curso) VALUES (3, '2020003', 'Ana Reis', NULL);
+INSERT INTO pets (id, apelido, raca, aluno_id) VALUES (1, 'Rex', 'Labrador', 1);
+INSERT INTO pets (id, apelido, aluno_id) VALUES (2, 'Mimi', 3)
+"""
+
+
+@pytest.mark.migracoes(esquema=ESQUEMA_ANTIGO)
+def test_migracoes_atualizam_banco_antigo(app):
+    test_migracoes_iguais_aos_modelos(app)
+
+    # Busca textual sobre as linhas que já existiam
+    busca = get_busca()
+    assert [a.nome for a in busca.filtrar_alunos(Aluno.query, 'souza')] == ['Maria Souza']
+    assert [p.apelido for p in busca.filtrar_pets(Pet.query, 'labrador')] == ['Rex']
+
+    colunas = (Estatistica.tipo, Estatistica.chave, Estatistica.total)
+    migradas = sorted(db.session.query(*colunas))
+    reconstruir_estatisticas()
+    assert migradas == sorted(db.session.query(*colunas))
+
+
+def test_create_tables_igual_aos_modelos():
+    assert _indices_sql() == _indices_modelos()
+
+
+@pytest.mark.migracoes
+def test_consultas_usam_indices(app, usuario):
+    gerar_base(300, fotos=0)
+    falhas = [
+        (origem, status, varreduras)
+        for origem, status, varreduras in verificar_indices(app, usuario)
+        if status != 200 or varreduras
+    ]
+    assert falhas == []
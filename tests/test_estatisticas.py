@@ -0,0 +1,104 @@
+"""
+Tabela ``estatisticas`` mantida a cada escrita: depois de cada operação as
+contagens têm de ser as mesmas que ``reconstruir_estatisticas()`` calcula.
+"""
+from io import BytesIO
+
+import pytest
+
+from app import db
+from app.models.aluno import Aluno
+from app.models.estatistica import Estatistica
+from app.models.pet import Pet
+from app.services.estatisticas import reconstruir_estatisticas
+from app.services.exclusao import excluir_alunos, excluir_pets
+from app.services.importacao import importar_arquivo
+
+
+def _contagens():
+    return sorted(
+        db.session.query(Estatistica.tipo, Estatistica.chave, Estatistica.total)
+        .filter(Estatistica.total > 0)
+    )
+
+
+def _conferir():
+    mantidas = _contagens()
+    reconstruir_estatisticas()
+    assert mantidas == _contagens()
+
+
+@pytest.fixture
+def base(app):
+    alunos = [
+        Aluno(matricula='1', nome='Ana', curso='Direito', idade=17, sexo='F'),
+        Aluno(matricula='2', nome='Bruno', curso='Direito', idade=30, sexo='M'),
+        Aluno(matricula='3', nome='Carla', curso=None, idade=None, sexo=None),
+    ]
+    db.session.add_all(alunos)
+    db.session.flush()
+    db.session.add_all([
+        Pet(apelido='Rex', raca='Labrador', aluno_id=alunos[0].id),
+        Pet(apelido='Mimi', raca=None, aluno_id=alunos[0].id),
+        Pet(apelido='Bob', raca='Labrador', aluno_id=alunos[1].id),
+    ])
+    db.session.commit()
+    ids = [a.id for a in alunos]
+    db.session.expunge_all()
+    return ids
+
+
+def test_insercao(base):
+    _conferir()
+
+
+@pytest.mark.parametrize('campo, valor', [
+    ('curso', 'Medicina'), ('curso', None), ('sexo', 'F'), ('idade', 40), ('idade', None),
+])
+def test_alteracao_aluno(base, campo, valor):
+    aluno = db.session.get(Aluno, base[1])
+    setattr(aluno, campo, valor)
+    db.session.commit()
+    _conferir()
+
+
+@pytest.mark.parametrize('campo, valor', [('raca', 'Poodle'), ('raca', None), ('aluno_id', 'outro')])
+def test_alteracao_pet(base, campo, valor):
+    pet = Pet.query.filter_by(apelido='Rex').one()
+    setattr(pet, campo, base[2] if valor == 'outro' else valor)
+    db.session.commit()
+    _conferir()
+
+
+def test_exclusao_aluno_com_pets(base):
+    # Pets não carregados: saem pela cascata do banco
+    db.session.delete(db.session.get(Aluno, base[0]))
+    db.session.commit()
+    _conferir()
+
+
+def test_exclusao_pet(base):
+    db.session.delete(Pet.query.filter_by(apelido='Bob').one())
+    db.session.commit()
+    _conferir()
+
+
+@pytest.mark.parametrize('excluir', [
+    lambda ids: Aluno.query.filter(Aluno.id.in_(ids[:2])).delete(),
+    lambda ids: Pet.query.filter(Pet.raca == 'Labrador').delete(),
+    lambda ids: Pet.query.delete(),
+    lambda ids: excluir_alunos(ids[:1]),
+    lambda ids: excluir_pets([p.id for p in Pet.query.filter_by(aluno_id=ids[0])]),
+], ids=['query-alunos', 'query-pets', 'query-todos-pets', 'excluir-alunos', 'excluir-pets'])
+def test_exclusao_em_massa(base, excluir):
+    excluir(base)
+    db.session.commit()
+    _conferir()
+
+
+def test_importacao(base):
+    importar_arquivo('alunos', BytesIO(
+        b'matricula,nome,curso,idade,sexo\n10,Davi,Medicina,22,M\n11,Eva,Direito,,F\n'
+    ), 'alunos.csv')
+    importar_arquivo('pets', BytesIO(b'apelido,raca,matricula\nTom,Siames,10\nLua,,11\n'), 'pets.csv')
+    _conferir()
@@ -0,0 +1,47 @@
+"""
+Upload de fotos: conteúdo que não é imagem, ou com pixels demais, é
+recusado com uma mensagem e sem gravar nada em disco.
+"""
+import os
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from app.models.aluno import Aluno
+from app.services.consultas import cliente_autenticado
+
+
+def _png(largura, altura):
+    saida = BytesIO()
+    Image.new('L', (largura, altura)).save(saida, 'PNG')
+    return saida.getvalue()
+
+
+def _arquivos(pasta):
+    return [nome for _, _, nomes in os.walk(pasta) for nome in nomes]
+
+
+def _enviar(app, usuario, dados):
+    client = cliente_autenticado(app, usuario)
+    return client.post('/alunos/criar', data={
+        'matricula': '2026001',
+        'nome': 'Maria Souza',
+        'foto': (BytesIO(dados), 'foto.png'),
+    }, content_type='multipart/form-data', follow_redirects=True)
+
+
+@pytest.mark.parametrize('dados', [_png(20, 20), b'nao sou uma imagem'], ids=['pixels', 'invalida'])
+def test_upload_recusado(app, usuario, dados):
+    app.config['FOTO_MAX_PIXELS'] = 100
+    resposta = _enviar(app, usuario, dados)
+    assert 'não é uma imagem válida' in resposta.get_data(as_text=True)
+    assert Aluno.query.count() == 0
+    assert _arquivos(app.config['FOTO_FOLDER']) == []
+
+
+def test_upload_aceito(app, usuario):
+    _enviar(app, usuario, _png(20, 20))
+    aluno = Aluno.query.one()
+    assert aluno.foto_hash
+    assert len(_arquivos(app.config['FOTO_FOLDER'])) == 1 + len(app.config['FOTO_MINIATURAS'])
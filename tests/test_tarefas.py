@@ -0,0 +1,60 @@
+"""
+Fila de tarefas: tarefas longas não são devolvidas à fila enquanto rodam,
+e erros ao registrar o estado não escapam de ``executar``.
+"""
+import os
+import time
+
+import pytest
+
+from app.services.tarefas import CONCLUIDA, EXECUTANDO, TIPOS, FilaArquivos, executar
+
+
+@pytest.fixture
+def fila(tmp_path):
+    return FilaArquivos(str(tmp_path / 'tarefas'), timeout=0.3)
+
+
+def _registrar(monkeypatch, funcao):
+    monkeypatch.setitem(TIPOS, 'teste', {'funcao': funcao, 'versao': lambda: 'v1'})
+
+
+def test_tarefa_longa_nao_expira(app, fila, monkeypatch):
+    reservadas = []
+
+    def lenta(versao):
+        time.sleep(1)
+        reservadas.append(fila.reservar())
+        return None
+
+    _registrar(monkeypatch, lenta)
+    fila.enfileirar('teste', 'v1')
+    executar(app, fila, fila.reservar())
+    assert reservadas == [None]
+    assert fila.status('teste-v1')['status'] == CONCLUIDA
+
+
+def test_tarefa_devolvida_a_fila_conclui(app, fila, monkeypatch):
+    def devolvida(versao):
+        # Outro processo já moveu o arquivo em execução
+        os.remove(fila._caminho(EXECUTANDO, 'teste-v1'))
+        return None
+
+    _registrar(monkeypatch, devolvida)
+    fila.enfileirar('teste', 'v1')
+    executar(app, fila, fila.reservar())
+    assert fila.status('teste-v1')['status'] == CONCLUIDA
+
+
+def test_erro_ao_registrar_nao_propaga(app, fila, monkeypatch):
+    def falha(versao):
+        raise RuntimeError('relatório')
+
+    def sem_disco(tarefa, erro):
+        raise OSError('disco cheio')
+
+    _registrar(monkeypatch, falha)
+    monkeypatch.setattr(fila, 'falhar', sem_disco)
+    fila.enfileirar('teste', 'v1')
+    executar(app, fila, fila.reservar())
+    assert fila.status('teste-v1')['status'] == EXECUTANDO